@@ -0,0 +1,111 @@
+from fastapi import status,HTTPException,Depends
+from App.schemas import AgentRegistrationSchema, AgentResponseModel, AgentReadSchema, AgentListSchema, BaseResponseModel, AgentPortfolioResponseSchema
+from App.models import Agent, Admin
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from App.utils import EmailUtils, CurrentLoginVerification, UserRole
+from App.auth import AuthService
+from App.database import async_unit_of_work
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.hashing import password_hasher
+from App.portfolio import portfolio_query, portfolio_months
+from Core import loggers
+
+from fastapi import APIRouter
+
+router = APIRouter()
+agent_fields = FieldSelection(AgentListSchema, Agent)
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/agent-register", status_code = status.HTTP_201_CREATED, response_model = AgentResponseModel, response_model_exclude = {"data": ["password"]})
+async def register_agent(agent: AgentRegistrationSchema, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    logger.info("Registering the Agent...")
+    result = await db.execute(select(Agent).filter(Agent.username == agent.username))
+    if result.scalars().first():
+        logger.exception("Agent already Exists")
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    hashed_password = await password_hasher.hash(agent.password)
+    new_agent = Agent(
+        username = agent.username,
+        password = hashed_password,
+        fullname = agent.fullname,
+        email = agent.email
+    )
+    
+    try:
+        db.add(new_agent)
+        db.add(AuthService.new_principal(UserRole.agent, new_agent))
+        EmailUtils.queue_email(db, new_agent.email,Subject="Credential Details for E-Insuarance App",
+                              body=f"""Welcome to the Application... \n Dear {new_agent.fullname}, 
+                              \n We are pleased to inform you that your e-Insurance account has been successfully created. 
+                              Below you will find your login credentials and instructions for accessing your account. 
+                              \n User Name: {new_agent.username} \n Password: {agent.password}""")
+        await db.flush()
+    except SQLAlchemyError as e:
+        logger.exception("Agent cannot be created")
+        raise HTTPException(status_code=500, detail="An error occurred while creating the Agent")
+    logger.info("Agent registered successfully")
+    return {"message": "Agent registered successfully", "status": 201, "data": new_agent}
+
+@router.get("/agent/read_all/", response_model = AgentReadSchema, response_model_exclude={'password'})
+async def read_agent(page: PageParams = Depends(), fields: tuple = Depends(agent_fields), db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    result = await db.execute(page.apply(select(*agent_fields.columns(fields, Agent.agent_id)), Agent.agent_id))
+    agents = result.all()
+    if not agents:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    agents, next_cursor = page.split(agents, Agent.agent_id)
+    return json_response(project_schema(AgentReadSchema, fields), {'data': agents, 'next_cursor': next_cursor})
+
+@router.get("/agent/read_by_id/{agent_id}", response_model = AgentResponseModel)
+async def read_agent_by_id(agent_id: int, fields: tuple = Depends(agent_fields), db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    agent = (await db.execute(select(*agent_fields.columns(fields)).filter(Agent.agent_id == agent_id))).first()
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return json_response(project_schema(AgentResponseModel, fields), {"message": "Agent read successfully", "status": status.HTTP_200_OK, "data": agent})
+
+@router.put("/agent/update/{agent_id}", response_model=AgentResponseModel)
+async def update_agent(agent_id: int, agent: AgentRegistrationSchema, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    db_agent = await db.get(Agent, agent_id)
+    if not db_agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    hashed_password = await password_hasher.hash(agent.password)
+    db_agent.username = agent.username
+    db_agent.password = hashed_password
+    db_agent.fullname = agent.fullname
+    db_agent.email = agent.email
+    
+    try:
+        await db.execute(AuthService.principal_update(UserRole.agent, db_agent))
+        await db.flush()
+    except SQLAlchemyError as e:
+        logger.exception("agent cannot be updated")
+        raise HTTPException(status_code=500, detail="An error occurred while updating the agent")
+    return {"message": "agent updated successfully", "status": 200, "data": db_agent}
+
+@router.delete("/agent/delete/{agent_id}", response_model=BaseResponseModel)
+async def delete_agent(agent_id: int, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    db_agent = await db.get(Agent, agent_id)
+    if not db_agent:
+        raise HTTPException(status_code=404, detail="agent not found")
+    
+    try:
+        await db.execute(AuthService.principal_delete(UserRole.agent, db_agent))
+        await db.delete(db_agent)
+        await db.flush()
+    except SQLAlchemyError as e:
+        logger.exception("agent cannot be deleted")
+        raise HTTPException(status_code=500, detail="An error occurred while deleting the agent")
+    return {"message": "agent deleted successfully", "status": 200}
+
+@router.get("/{agent_id}/portfolio", response_model=AgentPortfolioResponseSchema)
+async def read_agent_portfolio(agent_id: int, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    rollups = (await db.execute(portfolio_query(agent_id))).scalars().all()
+    if not rollups:
+        raise HTTPException(status_code=404, detail="No portfolio for this agent")
+    return json_response(AgentPortfolioResponseSchema, {"message": "Agent portfolio fetched successfully", "status": status.HTTP_200_OK, "agent_id": agent_id, "data": portfolio_months(rollups)})
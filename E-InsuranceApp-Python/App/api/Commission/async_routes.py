@@ -0,0 +1,29 @@
+from fastapi import status,HTTPException,Depends
+from App.schemas import CommissionResponseSchema, AgentCommissionTotalResponseSchema
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Commission, AgentCommissionTotal
+from fastapi import APIRouter
+from App.database import async_unit_of_work
+from App.serialization import json_response
+from App.pagination import PageParams
+
+router = APIRouter()
+
+@router.get("/get_agent_commission/{agent_id}", response_model=CommissionResponseSchema, status_code=status.HTTP_200_OK)
+async def get_agent_commission(agent_id: int, page: PageParams = Depends(), db: AsyncSession = async_unit_of_work):
+    total = await db.get(AgentCommissionTotal, agent_id)
+    if not total or not total.commission_count:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    result = await db.execute(page.apply(select(Commission.commission_id, Commission.agent_id).filter(Commission.agent_id == agent_id), Commission.commission_id))
+    agent, next_cursor = page.split(result.all(), Commission.commission_id)
+
+    return json_response(CommissionResponseSchema, {"message": f"Agent Data for AgentID:{agent_id} fetched successfully", "status": 200,"data":agent, "total_commission": total.total_commission, "next_cursor": next_cursor})    
+
+@router.get("/agent_total/{agent_id}", response_model=AgentCommissionTotalResponseSchema, status_code=status.HTTP_200_OK)
+async def get_agent_commission_total(agent_id: int, db: AsyncSession = async_unit_of_work):
+    total = await db.get(AgentCommissionTotal, agent_id)
+    if not total:
+        raise HTTPException(status_code=404, detail="No commission recorded for this agent")
+    return {"message": f"Commission total for AgentID:{agent_id} fetched successfully", "status": 200, "data": total}
@@ -1,28 +1,36 @@
 from fastapi import status,HTTPException,Depends
-from App.schemas import CommissionSchema, CommissionResponseSchema
+from App.schemas import CommissionResponseSchema, AgentCommissionTotalResponseSchema
 from sqlalchemy.orm import Session
-from App.models import Commission
+from App.models import Commission, Employee, AgentCommissionTotal
 from App.utils import CurrentLoginVerification
-from sqlalchemy.exc import SQLAlchemyError
 from fastapi import APIRouter
-from App.database import DataBaseConnection
+from App.database import unit_of_work
+from App.serialization import json_response
+from App.export import ExportParams, export_response
+from App.pagination import PageParams
 
 router = APIRouter()
 
 @router.get("/get_agent_commission/{agent_id}", response_model=CommissionResponseSchema, status_code=status.HTTP_200_OK)
-def get_agent_commission(agent_id: int, db: Session = Depends(DataBaseConnection.get_db_session)):
-    try:
-        agent = db.query(Commission).filter(Commission.agent_id == agent_id).all()     
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
+def get_agent_commission(agent_id: int, page: PageParams = Depends(), db: Session = unit_of_work):
+    total = db.get(AgentCommissionTotal, agent_id)
+    if not total or not total.commission_count:
+        raise HTTPException(status_code=404, detail="Agent not found")
 
-        agent_data = [CommissionSchema.from_orm(plan) for plan in agent]
-        total_commission = sum(agent.commission_amount for agent in agent)   
+    agent = page.apply(db.query(Commission.commission_id, Commission.agent_id).filter(Commission.agent_id == agent_id), Commission.commission_id).all()
+    agent, next_cursor = page.split(agent, Commission.commission_id)
 
-        return {"message": f"Agent Data for AgentID:{agent_id} fetched successfully", "status": 200,"data":agent_data, "total_commission": total_commission}    
+    return json_response(CommissionResponseSchema, {"message": f"Agent Data for AgentID:{agent_id} fetched successfully", "status": 200,"data":agent, "total_commission": total.total_commission, "next_cursor": next_cursor})    
 
-    except HTTPException as http_exc:
-        raise http_exc
+@router.get("/agent_total/{agent_id}", response_model=AgentCommissionTotalResponseSchema, status_code=status.HTTP_200_OK)
+def get_agent_commission_total(agent_id: int, db: Session = unit_of_work):
+    total = db.get(AgentCommissionTotal, agent_id)
+    if not total:
+        raise HTTPException(status_code=404, detail="No commission recorded for this agent")
+    return {"message": f"Commission total for AgentID:{agent_id} fetched successfully", "status": 200, "data": total}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
\ No newline at end of file
+COMMISSION_EXPORT_COLUMNS = [Commission.commission_id, Commission.agent_id, Commission.policy_id, Commission.commission_amount, Commission.created_at]
+
+@router.get("/export")
+def export_commissions(params: ExportParams = Depends(), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    return export_response("commissions", COMMISSION_EXPORT_COLUMNS, Commission.created_at, params)
@@ -0,0 +1,161 @@
+from fastapi import status,HTTPException,Depends
+from typing import List
+from App.schemas import CustomerRegistrationSchema, CustomerReadSchema, CustomerResponseSchema, CustomersListResponseSchema, BulkCustomerRegistrationResponseSchema
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Customer, Admin
+from App.utils import EmailUtils, CurrentLoginVerification, UserRole
+from App.auth import AuthService
+from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter
+from App.database import async_unit_of_work, after_commit
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.hashing import password_hasher
+from App.onboarding import existing_usernames_query, known_agents_query, split_bulk_customers, add_bulk_customers, created_rows
+from App.portfolio import increment_agent_portfolio_async, increment_agent_portfolios_async, customers_by_agent, move_customer_portfolio_async
+from Core.settings import settings
+from Core import loggers
+
+router = APIRouter()
+customer_fields = FieldSelection(CustomerReadSchema, Customer)
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/customer-register", status_code = status.HTTP_201_CREATED, response_model = CustomerResponseSchema, response_model_exclude = {"data": ["password"]})
+async def register_customer(customer: CustomerRegistrationSchema, db: AsyncSession = async_unit_of_work):
+    logger.info("Registering the Customer...")
+    result = await db.execute(select(Customer).filter(Customer.username == customer.username))
+    if result.scalars().first():
+        logger.exception("Customer already Exists")
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    hashed_password = await password_hasher.hash(customer.password)
+    new_customer = Customer(
+        username = customer.username,
+        password = hashed_password,
+        fullname = customer.fullname,
+        email = customer.email,
+        phone_number = customer.phone_number,
+        date_of_birth = customer.date_of_birth,
+        agent_id = customer.agent_id
+    )
+    
+    try:
+        db.add(new_customer)
+        db.add(AuthService.new_principal(UserRole.customer, new_customer))
+        EmailUtils.queue_email(db, new_customer.email,Subject="Credential Details for E-Insuarance App",
+                              body=f"""Welcome to the Application... \n Dear {new_customer.fullname}, \n 
+                              We are pleased to inform you that your e-Insurance account has been successfully created. 
+                              Below you will find your login credentials and instructions for accessing your account. 
+                              \n User Name: {new_customer.username} \n Password: {customer.password}""")
+        await db.flush()
+        await increment_agent_portfolio_async(db, new_customer.agent_id, customers_added=1)
+    except SQLAlchemyError as e:
+        logger.exception("Customer cannot be created")
+        raise HTTPException(status_code=500, detail="Agent Not Exist")
+    logger.info("Customer registered successfully")
+    return {"message": "Customer registered successfully", "status": 201, "data": new_customer}
+
+@router.post("/bulk-register", status_code = status.HTTP_201_CREATED, response_model = BulkCustomerRegistrationResponseSchema)
+async def bulk_register_customers(customers: List[CustomerRegistrationSchema], db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    logger.info(f"Bulk registering {len(customers)} Customers...")
+    if len(customers) > settings.BULK_REGISTER_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.BULK_REGISTER_MAX_ROWS} customers per request")
+    if not customers:
+        return {"message": "No customers to register", "status": 201, "created": 0, "data": [], "errors": []}
+
+    existing_usernames = set((await db.execute(existing_usernames_query(customers))).scalars())
+    agent_ids = set((await db.execute(known_agents_query(customers))).scalars())
+    accepted, errors = split_bulk_customers(customers, existing_usernames, agent_ids)
+    hashed_passwords = await password_hasher.hash_many([customer.password for _, customer in accepted])
+
+    try:
+        staged = add_bulk_customers(db, accepted, hashed_passwords)
+        await db.flush()
+        await increment_agent_portfolios_async(db, customers_by_agent([customer.agent_id for _, customer in accepted]))
+        created = created_rows(staged)
+    except SQLAlchemyError as e:
+        logger.exception("Customers cannot be bulk registered")
+        raise HTTPException(status_code=500, detail="An error occurred while registering the customers")
+    logger.info(f"Bulk registered {len(created)} Customers, {len(errors)} rejected")
+    return {"message": "Customers registered successfully", "status": 201, "created": len(created), "data": created, "errors": errors}
+    
+@router.get("/read_customer/", response_model=CustomersListResponseSchema)
+async def read_customers(page: PageParams = Depends(), fields: tuple = Depends(customer_fields), db: AsyncSession = async_unit_of_work):
+    try:
+        result = await db.execute(page.apply(select(*customer_fields.columns(fields, Customer.customer_id)), Customer.customer_id))
+        customers = result.all()
+        if not customers:
+            logger.warning("Customer Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customers Not Found")
+        logger.info("Customers Retrieved Successfully from Database")
+        customers_list, next_cursor = page.split(customers, Customer.customer_id)
+        return json_response(project_schema(CustomersListResponseSchema, fields), {"message": "Customer read successfully", "status": 200, "data": customers_list, "next_cursor": next_cursor})
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving customers from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
+
+@router.get("/read_customer_id/", response_model=CustomerResponseSchema,response_model_exclude={"data":["password"]})
+async def read_customers_by_id(customer_id:int,fields: tuple = Depends(customer_fields),db: AsyncSession = async_unit_of_work):
+    try:
+        customers = (await db.execute(select(*customer_fields.columns(fields)).filter(Customer.customer_id == customer_id))).first()
+        if not customers:
+            logger.warning("Customer Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
+        logger.info("Customers Retrieved Successfully from Database")
+        return json_response(project_schema(CustomerResponseSchema, fields), {"message": "Customers Retrieved Successfully from Database", "status": 200, "data": customers})
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving customers from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
+
+@router.put("/update_customer/{customer_id}", response_model=CustomerResponseSchema, response_model_exclude={"data": ["password"]})
+async def update_customer(customer_id: int, customer_update: CustomerRegistrationSchema, db: AsyncSession = async_unit_of_work):
+    try:
+        customer = await db.get(Customer, customer_id)
+        if not customer:
+            logger.warning("Customer Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
+        
+        old_username, old_agent_id = customer.username, customer.agent_id
+        changes = customer_update.model_dump(exclude_unset=True)
+        if "password" in changes:
+            customer.password = await password_hasher.hash(changes.pop("password"))
+        for key, value in changes.items():
+            setattr(customer, key, value)
+        if customer.agent_id != old_agent_id:
+            await move_customer_portfolio_async(db, customer, old_agent_id)
+        await db.execute(AuthService.principal_update(UserRole.customer, customer))
+        
+        await db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.customer, old_username, customer_update.username)
+        
+        logger.info("Customer Updated Successfully")
+        return {"message": "Customer Updated Successfully", "status": 200, "data": customer}
+    
+    except HTTPException as e:
+        logger.error(f"Error updating customer: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating customer")
+
+@router.delete("/delete_customer/{customer_id}", response_model=CustomerResponseSchema, response_model_exclude={"data": ["password"]})
+async def delete_customer(customer_id: int, db: AsyncSession = async_unit_of_work):
+    try:
+        customer = await db.get(Customer, customer_id)
+        if not customer:
+            logger.warning("Customer Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
+        
+        await db.execute(AuthService.principal_delete(UserRole.customer, customer))
+        await db.delete(customer)
+        await db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.customer, customer.username)
+        
+        logger.info("Customer Deleted Successfully")
+        return {"message": "Customer Deleted Successfully", "status": 200, "data": customer}
+    
+    except HTTPException as e:
+        logger.error(f"Error deleting customer: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting customer")
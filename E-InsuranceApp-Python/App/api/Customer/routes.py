@@ -1,28 +1,38 @@
 from fastapi import FastAPI,status,HTTPException,Depends
 from fastapi.security import APIKeyHeader
-from App.schemas import CustomerRegistrationSchema, CustomerReadSchema, CustomerResponseSchema, CustomersListResponseSchema, BaseResponseModel
+from typing import List
+from App.schemas import CustomerRegistrationSchema, CustomerReadSchema, CustomerResponseSchema, CustomersListResponseSchema, BaseResponseModel, BulkCustomerRegistrationResponseSchema
 from sqlalchemy.orm import Session
-from App.models import Customer
-from App.utils import EmailUtils,PasswordUtils
+from App.models import Customer, Employee, Admin
+from App.utils import EmailUtils, CurrentLoginVerification, UserRole
+from App.auth import AuthService
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import APIRouter
-from App.database import DataBaseConnection
+from App.database import unit_of_work, after_commit
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.export import ExportParams, export_response
+from App.hashing import password_hasher
+from App.onboarding import existing_usernames_query, known_agents_query, split_bulk_customers, add_bulk_customers, created_rows
+from App.portfolio import increment_agent_portfolio, increment_agent_portfolios, customers_by_agent, move_customer_portfolio
+from Core.settings import settings
 from Core import loggers
 
 router = APIRouter()
+customer_fields = FieldSelection(CustomerReadSchema, Customer)
 
-log_file = "insurance.log"
-logger = loggers.setup_logger(log_file)
+logger = loggers.get_logger(__name__)
 
 @router.post("/customer-register", status_code = status.HTTP_201_CREATED, response_model = CustomerResponseSchema, response_model_exclude = {"data": ["password"]})
-def register_customer(customer: CustomerRegistrationSchema, db: Session = Depends(DataBaseConnection.get_db_session)):
+def register_customer(customer: CustomerRegistrationSchema, db: Session = unit_of_work):
     logger.info("Registering the Customer...")
     customer_exists = db.query(Customer).filter(Customer.username == customer.username).first()
     if customer_exists:
         logger.exception("Customer already Exists")
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = PasswordUtils.hash_password(customer.password)
+    hashed_password = password_hasher.hash_sync(customer.password)
     new_customer = Customer(
         username = customer.username,
         password = hashed_password,
@@ -35,64 +45,93 @@ def register_customer(customer: CustomerRegistrationSchema, db: Session = Depend
     
     try:
         db.add(new_customer)
-        db.commit()
-        db.refresh(new_customer)
-        EmailUtils.send_email(new_customer.email,Subject="Credential Details for E-Insuarance App",
+        db.add(AuthService.new_principal(UserRole.customer, new_customer))
+        EmailUtils.queue_email(db, new_customer.email,Subject="Credential Details for E-Insuarance App",
                               body=f"""Welcome to the Application... \n Dear {new_customer.fullname}, \n 
                               We are pleased to inform you that your e-Insurance account has been successfully created. 
                               Below you will find your login credentials and instructions for accessing your account. 
                               \n User Name: {new_customer.username} \n Password: {customer.password}""")
+        db.flush()
+        increment_agent_portfolio(db, new_customer.agent_id, customers_added=1)
     except SQLAlchemyError as e:
         logger.exception("Customer cannot be created")
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Agent Not Exist {e}")
+        raise HTTPException(status_code=500, detail="Agent Not Exist")
     logger.info("Customer registered successfully")
     return {"message": "Customer registered successfully", "status": 201, "data": new_customer}
+
+@router.post("/bulk-register", status_code = status.HTTP_201_CREATED, response_model = BulkCustomerRegistrationResponseSchema)
+def bulk_register_customers(customers: List[CustomerRegistrationSchema], db: Session = unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user)):
+    logger.info(f"Bulk registering {len(customers)} Customers...")
+    if len(customers) > settings.BULK_REGISTER_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.BULK_REGISTER_MAX_ROWS} customers per request")
+    if not customers:
+        return {"message": "No customers to register", "status": 201, "created": 0, "data": [], "errors": []}
+
+    existing_usernames = set(db.execute(existing_usernames_query(customers)).scalars())
+    agent_ids = set(db.execute(known_agents_query(customers)).scalars())
+    accepted, errors = split_bulk_customers(customers, existing_usernames, agent_ids)
+    hashed_passwords = password_hasher.hash_many_sync([customer.password for _, customer in accepted])
+
+    try:
+        staged = add_bulk_customers(db, accepted, hashed_passwords)
+        db.flush()
+        increment_agent_portfolios(db, customers_by_agent([customer.agent_id for _, customer in accepted]))
+        created = created_rows(staged)
+    except SQLAlchemyError as e:
+        logger.exception("Customers cannot be bulk registered")
+        raise HTTPException(status_code=500, detail="An error occurred while registering the customers")
+    logger.info(f"Bulk registered {len(created)} Customers, {len(errors)} rejected")
+    return {"message": "Customers registered successfully", "status": 201, "created": len(created), "data": created, "errors": errors}
     
 @router.get("/read_customer/", response_model=CustomersListResponseSchema)
-def read_customers(db: Session = Depends(DataBaseConnection.get_db_session)):
+def read_customers(page: PageParams = Depends(), fields: tuple = Depends(customer_fields), db: Session = unit_of_work):
     try:
-        customers = db.query(Customer).all()
+        customers = page.apply(db.query(*customer_fields.columns(fields, Customer.customer_id)), Customer.customer_id).all()
         if not customers:
             logger.warning("Customer Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customers Not Found")
         logger.info("Customers Retrieved Successfully from Database")
-        customers_list = [
-            customer for customer in customers
-        ]
-        return {"message": "Customer read successfully", "status": 200, "data": customers_list}
+        customers_list, next_cursor = page.split(customers, Customer.customer_id)
+        return json_response(project_schema(CustomersListResponseSchema, fields), {"message": "Customer read successfully", "status": 200, "data": customers_list, "next_cursor": next_cursor})
     
     except HTTPException as e:
         logger.error(f"Error retrieving customers from database: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
 
 @router.get("/read_customer_id/", response_model=CustomerResponseSchema,response_model_exclude={"data":["password"]})
-def read_customers_by_id(customer_id:int,db: Session = Depends(DataBaseConnection.get_db_session)):
+def read_customers_by_id(customer_id:int,fields: tuple = Depends(customer_fields),db: Session = unit_of_work):
     try:
-        customers = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+        customers = db.query(*customer_fields.columns(fields)).filter(Customer.customer_id == customer_id).first()
         if not customers:
             logger.warning("Customer Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
         logger.info("Customers Retrieved Successfully from Database")
-        return {"message": "Customers Retrieved Successfully from Database", "status": 200, "data": customers}
+        return json_response(project_schema(CustomerResponseSchema, fields), {"message": "Customers Retrieved Successfully from Database", "status": 200, "data": customers})
     
     except HTTPException as e:
         logger.error(f"Error retrieving customers from database: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
 
 @router.put("/update_customer/{customer_id}", response_model=CustomerResponseSchema, response_model_exclude={"data": ["password"]})
-def update_customer(customer_id: int, customer_update: CustomerRegistrationSchema, db: Session = Depends(DataBaseConnection.get_db_session)):
+def update_customer(customer_id: int, customer_update: CustomerRegistrationSchema, db: Session = unit_of_work):
     try:
         customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
         if not customer:
             logger.warning("Customer Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
         
-        for key, value in customer_update.model_dump(exclude_unset=True).items():
+        old_username, old_agent_id = customer.username, customer.agent_id
+        changes = customer_update.model_dump(exclude_unset=True)
+        if "password" in changes:
+            customer.password = password_hasher.hash_sync(changes.pop("password"))
+        for key, value in changes.items():
             setattr(customer, key, value)
+        if customer.agent_id != old_agent_id:
+            move_customer_portfolio(db, customer, old_agent_id)
+        db.execute(AuthService.principal_update(UserRole.customer, customer))
         
-        db.commit()
-        db.refresh(customer)
+        db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.customer, old_username, customer_update.username)
         
         logger.info("Customer Updated Successfully")
         return {"message": "Customer Updated Successfully", "status": 200, "data": customer}
@@ -102,15 +141,17 @@ def update_customer(customer_id: int, customer_update: CustomerRegistrationSchem
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating customer")
 
 @router.delete("/delete_customer/{customer_id}", response_model=CustomerResponseSchema, response_model_exclude={"data": ["password"]})
-def delete_customer(customer_id: int, db: Session = Depends(DataBaseConnection.get_db_session)):
+def delete_customer(customer_id: int, db: Session = unit_of_work):
     try:
         customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
         if not customer:
             logger.warning("Customer Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer Not Found")
         
+        db.execute(AuthService.principal_delete(UserRole.customer, customer))
         db.delete(customer)
-        db.commit()
+        db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.customer, customer.username)
         
         logger.info("Customer Deleted Successfully")
         return {"message": "Customer Deleted Successfully", "status": 200, "data": customer}
@@ -118,3 +159,10 @@ def delete_customer(customer_id: int, db: Session = Depends(DataBaseConnection.g
     except HTTPException as e:
         logger.error(f"Error deleting customer: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting customer")
+
+CUSTOMER_EXPORT_COLUMNS = [Customer.customer_id, Customer.username, Customer.fullname, Customer.email, Customer.phone_number, Customer.date_of_birth, Customer.agent_id, Customer.created_at]
+
+@router.get("/export")
+def export_customers(params: ExportParams = Depends(), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    logger.info("Exporting customers...")
+    return export_response("customers", CUSTOMER_EXPORT_COLUMNS, Customer.created_at, params)
@@ -0,0 +1,104 @@
+from fastapi import status,HTTPException,Depends
+from App.schemas import BaseResponseModel, EmployeeRegistrationSchema, EmployeeReadSchema, EmployeeListSchema, EmployeeResponseSchema
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from App.models import Employee, Admin
+from App.utils import EmailUtils,CurrentLoginVerification, UserRole
+from App.auth import AuthService
+from App.database import async_unit_of_work, after_commit
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.hashing import password_hasher
+from fastapi import APIRouter
+from Core import loggers
+
+router = APIRouter()
+employee_fields = FieldSelection(EmployeeListSchema, Employee)
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/employee-register", status_code = status.HTTP_201_CREATED, response_model = EmployeeResponseSchema, response_model_exclude = {"data": ["password"]})
+async def register_employee(employee: EmployeeRegistrationSchema, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    logger.info("Registering the Employee...")
+    result = await db.execute(select(Employee).filter(Employee.username == employee.username))
+    if result.scalars().first():
+        logger.exception("Employee already Exists")
+        raise HTTPException(status_code=400, detail="Username already registered")
+    
+    hashed_password = await password_hasher.hash(employee.password)
+    new_employee = Employee(
+        username = employee.username,
+        password = hashed_password,
+        fullname = employee.fullname,
+        email = employee.email,
+        role = employee.role
+    )
+    
+    try:
+        db.add(new_employee)
+        db.add(AuthService.new_principal(UserRole.employee, new_employee))
+        EmailUtils.queue_email(db, new_employee.email,Subject="Credential Details for E-Insuarance App",
+                              body=f"""Welcome to the Application... \n Dear {new_employee.fullname}, \n 
+                              We are pleased to inform you that your e-Insurance account has been successfully created. 
+                              Below you will find your login credentials and instructions for accessing your account. 
+                              \n User Name: {new_employee.username} \n Password: {employee.password}""")
+        await db.flush()
+    except SQLAlchemyError as e:
+        logger.exception("Employee cannot be created")
+        raise HTTPException(status_code=500, detail="An error occurred while creating the Employee")
+    logger.info("Employee registered successfully")
+    return {"message": "Employee registered successfully", "status": 201, "data": new_employee}
+
+@router.get("/employee/read_all/", response_model = EmployeeReadSchema)
+async def read_employees(page: PageParams = Depends(), fields: tuple = Depends(employee_fields), db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    result = await db.execute(page.apply(select(*employee_fields.columns(fields, Employee.employee_id)), Employee.employee_id))
+    employees, next_cursor = page.split(result.all(), Employee.employee_id)
+    return json_response(project_schema(EmployeeReadSchema, fields), {"message": "Employee read successfully", "status": 201,'data': employees, "next_cursor": next_cursor})
+
+@router.get("/employees/read_by_id/{employee_id}", response_model = EmployeeResponseSchema)
+async def read_employee_by_id(employee_id: int, fields: tuple = Depends(employee_fields), db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    employee = (await db.execute(select(*employee_fields.columns(fields)).filter(Employee.employee_id == employee_id))).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return json_response(project_schema(EmployeeResponseSchema, fields), {"message": "Employee read successfully", "status": status.HTTP_200_OK, "data": employee})
+
+@router.put("/employees/update/{employee_id}", response_model=EmployeeResponseSchema)
+async def update_employee(employee_id: int, employee: EmployeeRegistrationSchema, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    db_employee = await db.get(Employee, employee_id)
+    if not db_employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    hashed_password = await password_hasher.hash(employee.password)
+    old_username = db_employee.username
+    db_employee.username = employee.username
+    db_employee.password = hashed_password
+    db_employee.fullname = employee.fullname
+    db_employee.email = employee.email
+    db_employee.role = employee.role
+    
+    try:
+        await db.execute(AuthService.principal_update(UserRole.employee, db_employee))
+        await db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.employee, old_username, employee.username)
+    except SQLAlchemyError as e:
+        logger.exception("Employee cannot be updated")
+        raise HTTPException(status_code=500, detail="An error occurred while updating the Employee")
+    return {"message": "Employee updated successfully", "status": 200, "data": db_employee}
+
+@router.delete("/employees/delete/{employee_id}", response_model=BaseResponseModel)
+async def delete_employee(employee_id: int, db: AsyncSession = async_unit_of_work, current_admin: Admin = Depends(CurrentLoginVerification.get_current_admin_user_async)):
+    db_employee = await db.get(Employee, employee_id)
+    if not db_employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    try:
+        await db.execute(AuthService.principal_delete(UserRole.employee, db_employee))
+        await db.delete(db_employee)
+        await db.flush()
+        after_commit(db, CurrentLoginVerification.invalidate_cached_user, UserRole.employee, db_employee.username)
+    except SQLAlchemyError as e:
+        logger.exception("Employee cannot be deleted")
+        raise HTTPException(status_code=500, detail="An error occurred while deleting the Employee")
+    return {"message": "Employee deleted successfully", "status": 200}
@@ -0,0 +1,104 @@
+from fastapi import status,HTTPException,Depends,Request,Response
+from App.schemas import BaseResponseModel, InsurancePlanSchema, InsurancePlanResponseSchema, InsuranceReadSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Employee,InsurancePlan
+from App.utils import CurrentLoginVerification
+from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter
+from App.database import async_unit_of_work, after_commit
+from App.serialization import json_response
+from App.catalog import catalog_cache
+from App.conditional import make_etag, check_not_modified
+from App.pagination import PageParams
+from Core import loggers
+
+router = APIRouter()
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/create_plan/", status_code = status.HTTP_201_CREATED, response_model = InsurancePlanResponseSchema)
+async def create_plan(plan: InsurancePlanSchema, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    logger.info("Creating Plans...")  
+    new_plan = InsurancePlan(**plan.model_dump())
+    try:
+        db.add(new_plan)
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+    except SQLAlchemyError as e:
+        logger.exception("Plan cannot be created")
+        raise HTTPException(status_code=500, detail="An error occurred while creating the Plan")
+    logger.info("Plan registered successfully")
+    return {"message": "Insurance createdsuccessfully", "status": status.HTTP_201_CREATED,"data": new_plan}
+
+@router.get("/read_insurance_plan/", response_model=InsuranceReadSchema)
+async def read_insurance_plan(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        catalog = await catalog_cache.current_async(db)
+        not_modified = check_not_modified(request, response, make_etag("plans", catalog.plans_fingerprint, page.limit, page.after))
+        if not_modified:
+            return not_modified
+        insurances = page.slice(catalog.plan_list, InsurancePlan.plan_id)
+        if not insurances:
+            logger.warning("Insurance Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Insurance Not Found")
+        logger.info("Insurances Retrieved Successfully from Database")
+        plans, next_cursor = page.split(insurances, InsurancePlan.plan_id)
+        return json_response(InsuranceReadSchema, {"message": "Insurance plans read successfully", "status": status.HTTP_200_OK, "data": plans, "next_cursor": next_cursor}, response)
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving insurances from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving insuarnces from database")
+
+@router.get("/read_insuranceplan_by_id/", response_model=InsurancePlanResponseSchema)
+async def read_plans_by_id(plan_id:int,db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        plans = (await catalog_cache.current_async(db)).plans.get(plan_id)
+        if not plans:
+            logger.warning("Plans Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plans Not Found")
+        logger.info("Plans Retrieved Successfully from Database")
+        return {"message": "Insurance plans read successfully", "status": status.HTTP_200_OK, "data": plans}
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving customers from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
+
+@router.put("/update_insurance_plan/{plan_id}", response_model=InsurancePlanResponseSchema)
+async def update_plan(plan_id: int, plan_update:InsurancePlanSchema, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        plan = await db.get(InsurancePlan, plan_id)
+        if not plan:
+            logger.warning("Plan Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan Not Found")
+        
+        for key, value in plan_update.model_dump(exclude_unset=True).items():
+            setattr(plan, key, value)
+        
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+        
+        logger.info("Plan Updated Successfully")
+        return {"message": "Insurance plans updated successfully", "status": status.HTTP_200_OK, "data": plan}
+    
+    except HTTPException as e:
+        logger.error(f"Error updating plan: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating plan")
+
+@router.delete("/delet_plan/{plan_id}", response_model=BaseResponseModel)
+async def delete_plan(plan_id: int, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        plan = await db.get(InsurancePlan, plan_id)
+        if not plan:
+            logger.warning("Plan Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan Not Found")
+        
+        await db.delete(plan)
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+        
+        logger.info("Plan Deleted Successfully")
+        return {"message":"Deleted","status":200}
+    
+    except HTTPException as e:
+        logger.error(f"Error deleting plan: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting Plan")
@@ -1,54 +1,58 @@
-from fastapi import status,HTTPException,Depends
+from fastapi import status,HTTPException,Depends,Request,Response
 from App.schemas import BaseResponseModel, InsurancePlanSchema, InsurancePlanResponseSchema, InsuranceReadSchema
 from sqlalchemy.orm import Session
 from App.models import Employee,InsurancePlan,InsurancePlan
 from App.utils import CurrentLoginVerification
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import APIRouter
-from App.database import DataBaseConnection
+from App.database import unit_of_work, after_commit
+from App.serialization import json_response
+from App.catalog import catalog_cache
+from App.conditional import make_etag, check_not_modified
+from App.pagination import PageParams
 from Core import loggers
 
 router = APIRouter()
 
-log_file = "insurance.log"
-logger = loggers.setup_logger(log_file)
+logger = loggers.get_logger(__name__)
 
 @router.post("/create_plan/", status_code = status.HTTP_201_CREATED, response_model = InsurancePlanResponseSchema)
-def create_plan(plan: InsurancePlanSchema, db: Session = Depends(DataBaseConnection.get_db_session), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+def create_plan(plan: InsurancePlanSchema, db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
     logger.info("Creating Plans...")  
     new_plan = InsurancePlan(**plan.model_dump())
     try:
         db.add(new_plan)
-        db.commit()
-        db.refresh(new_plan)
+        db.flush()
+        after_commit(db, catalog_cache.invalidate)
     except SQLAlchemyError as e:
         logger.exception("Plan cannot be created")
-        db.rollback()
         raise HTTPException(status_code=500, detail="An error occurred while creating the Plan")
     logger.info("Plan registered successfully")
     return {"message": "Insurance createdsuccessfully", "status": status.HTTP_201_CREATED,"data": new_plan}
 
 @router.get("/read_insurance_plan/", response_model=InsuranceReadSchema)
-def read_insurance_plan(db: Session = Depends(DataBaseConnection.get_db_session), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+def read_insurance_plan(request: Request, response: Response, page: PageParams = Depends(), db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
     try:
-        insurances = db.query(InsurancePlan).all()
+        catalog = catalog_cache.current(db)
+        not_modified = check_not_modified(request, response, make_etag("plans", catalog.plans_fingerprint, page.limit, page.after))
+        if not_modified:
+            return not_modified
+        insurances = page.slice(catalog.plan_list, InsurancePlan.plan_id)
         if not insurances:
             logger.warning("Insurance Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Insurance Not Found")
         logger.info("Insurances Retrieved Successfully from Database")
-        plans = [
-            ins for ins in insurances
-        ]
-        return {"message": "Insurance plans read successfully", "status": status.HTTP_200_OK, "data": plans}
+        plans, next_cursor = page.split(insurances, InsurancePlan.plan_id)
+        return json_response(InsuranceReadSchema, {"message": "Insurance plans read successfully", "status": status.HTTP_200_OK, "data": plans, "next_cursor": next_cursor}, response)
     
     except HTTPException as e:
         logger.error(f"Error retrieving insurances from database: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving insuarnces from database")
 
 @router.get("/read_insuranceplan_by_id/", response_model=InsurancePlanResponseSchema)
-def read_plans_by_id(plan_id:int,db: Session = Depends(DataBaseConnection.get_db_session), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+def read_plans_by_id(plan_id:int,db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
     try:
-        plans = db.query(InsurancePlan).filter(InsurancePlan.plan_id == plan_id).first()
+        plans = catalog_cache.current(db).plans.get(plan_id)
         if not plans:
             logger.warning("Plans Not Found")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plans Not Found")
@@ -60,7 +64,7 @@ def read_plans_by_id(plan_id:int,db: Session = Depends(DataBaseConnection.get_db
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving customers from database")
 
 @router.put("/update_insurance_plan/{plan_id}", response_model=InsurancePlanResponseSchema)
-def update_plan(plan_id: int, plan_update:InsurancePlanSchema, db: Session = Depends(DataBaseConnection.get_db_session), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+def update_plan(plan_id: int, plan_update:InsurancePlanSchema, db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
     try:
         plan = db.query(InsurancePlan).filter(InsurancePlan.plan_id == plan_id).first()
         if not plan:
@@ -70,8 +74,8 @@ def update_plan(plan_id: int, plan_update:InsurancePlanSchema, db: Session = Dep
         for key, value in plan_update.model_dump(exclude_unset=True).items():
             setattr(plan, key, value)
         
-        db.commit()
-        db.refresh(plan)
+        db.flush()
+        after_commit(db, catalog_cache.invalidate)
         
         logger.info("Plan Updated Successfully")
         return {"message": "Insurance plans updated successfully", "status": status.HTTP_200_OK, "data": plan}
@@ -81,7 +85,7 @@ def update_plan(plan_id: int, plan_update:InsurancePlanSchema, db: Session = Dep
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating plan")
 
 @router.delete("/delet_plan/{plan_id}", response_model=BaseResponseModel)
-def delete_plan(plan_id: int, db: Session = Depends(DataBaseConnection.get_db_session), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+def delete_plan(plan_id: int, db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
     try:
         plan = db.query(InsurancePlan).filter(InsurancePlan.plan_id==plan_id).first()
         if not plan:
@@ -89,7 +93,8 @@ def delete_plan(plan_id: int, db: Session = Depends(DataBaseConnection.get_db_se
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan Not Found")
         
         db.delete(plan)
-        db.commit()
+        db.flush()
+        after_commit(db, catalog_cache.invalidate)
         
         logger.info("Customer Deleted Successfully")
         return {"message":"Deleted","status":200}
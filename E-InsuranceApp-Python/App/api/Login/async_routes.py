@@ -0,0 +1,24 @@
+from fastapi import HTTPException
+from App.schemas import LoginSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.auth import AuthService
+from App.utils import JWTUtils
+from fastapi import APIRouter
+from App.database import async_unit_of_work
+from Core import loggers
+
+router = APIRouter()
+
+logger = loggers.get_logger(__name__)
+
+@router.post('/login/',status_code=200)
+async def login(user: LoginSchema, db: AsyncSession = async_unit_of_work):
+    logger.info("Login Attempted!!!")
+    try : 
+        principal = await AuthService.authenticate_async(db, user.role, user.email, user.password)
+    except HTTPException as e:
+        logger.exception(f"Error in Logging {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while Logging")
+    user_data = {"username": principal.username, "role": user.role}
+    access_token = JWTUtils.encode_jwt(payload=user_data)
+    return {"access_token": access_token}
@@ -0,0 +1,39 @@
+from fastapi import status,HTTPException,Depends,Response
+from typing import List
+from App.schemas import PaymentSchema, PaymentResponseSchema, PaymentBatchResponseSchema
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from App.models import Employee
+from App.utils import CurrentLoginVerification
+from fastapi import APIRouter
+from App.database import async_unit_of_work
+from App.serialization import json_response
+from App.payments import ingest_payments_async, payment_result, KEY_IN_FLIGHT
+from Core.settings import settings
+from Core import loggers
+
+router = APIRouter()
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/create_payment", status_code=status.HTTP_201_CREATED, response_model=PaymentResponseSchema)
+async def create_payment(payment: PaymentSchema, response: Response, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        rows, errors = await ingest_payments_async(db, [payment])
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=KEY_IN_FLIGHT)
+    return payment_result(payment, rows, errors, response)
+
+@router.post("/create_payments", status_code=status.HTTP_201_CREATED, response_model=PaymentBatchResponseSchema)
+async def create_payments(payments: List[PaymentSchema], db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    if len(payments) > settings.PAYMENT_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.PAYMENT_BATCH_MAX_ROWS} payments per request")
+    if not payments:
+        return {"message": "No payments to record", "status": 201, "created": 0, "data": [], "errors": []}
+    try:
+        rows, errors = await ingest_payments_async(db, payments)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=KEY_IN_FLIGHT)
+    created = sum(not row["duplicate"] for row in rows)
+    logger.info(f"Recorded {created} payments, {len(rows) - created} replayed, {len(errors)} rejected")
+    return json_response(PaymentBatchResponseSchema, {"message": "Payments recorded successfully", "status": 201, "created": created, "data": rows, "errors": errors}, status_code=201)
@@ -0,0 +1,70 @@
+import os
+from datetime import date
+from fastapi import status,HTTPException,Depends,Response,Request,Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List, Optional
+from App.schemas import PaymentSchema, PaymentResponseSchema, PaymentBatchResponseSchema
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from App.models import Employee
+from App.utils import CurrentLoginVerification
+from fastapi import APIRouter
+from App.database import unit_of_work
+from App.serialization import json_response
+from App.payments import ingest_payments, payment_result, KEY_IN_FLIGHT
+from App.reconciliation import Reconciliation
+from Core.settings import settings
+from Core import loggers
+
+router = APIRouter()
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/create_payment", status_code=status.HTTP_201_CREATED, response_model=PaymentResponseSchema)
+def create_payment(payment: PaymentSchema, response: Response, db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    try:
+        rows, errors = ingest_payments(db, [payment])
+    except IntegrityError:
+        # Another delivery of the same key won the race; a retry now replays its payment.
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=KEY_IN_FLIGHT)
+    return payment_result(payment, rows, errors, response)
+
+@router.post("/create_payments", status_code=status.HTTP_201_CREATED, response_model=PaymentBatchResponseSchema)
+def create_payments(payments: List[PaymentSchema], db: Session = unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    if len(payments) > settings.PAYMENT_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.PAYMENT_BATCH_MAX_ROWS} payments per request")
+    if not payments:
+        return {"message": "No payments to record", "status": 201, "created": 0, "data": [], "errors": []}
+    try:
+        rows, errors = ingest_payments(db, payments)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=KEY_IN_FLIGHT)
+    created = sum(not row["duplicate"] for row in rows)
+    logger.info(f"Recorded {created} payments, {len(rows) - created} replayed, {len(errors)} rejected")
+    return json_response(PaymentBatchResponseSchema, {"message": "Payments recorded successfully", "status": 201, "created": created, "data": rows, "errors": errors}, status_code=201)
+
+# Async so the statement can be spooled from the request stream; the rest runs in the threadpool.
+@router.post("/reconcile", response_class=StreamingResponse)
+async def reconcile_statement(request: Request, date_from: Optional[date] = Query(None, description="First payment date to consider, the statement's first by default"),
+                              date_to: Optional[date] = Query(None, description="Last payment date to consider, the statement's last by default"),
+                              current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    """Reconcile the CSV statement sent as the request body; streams back one CSV tagging every row matched, unmatched or duplicate."""
+    reconciliation = Reconciliation()
+    try:
+        statement_path = os.path.join(reconciliation.workdir, "statement.csv")
+        with open(statement_path, "wb") as statement:
+            async for chunk in request.stream():
+                await run_in_threadpool(statement.write, chunk)
+        await run_in_threadpool(reconciliation.prepare, statement_path, date_from, date_to)
+    except ValueError as e:
+        reconciliation.close()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        reconciliation.close()
+        logger.exception("Statement reconciliation failed")
+        raise HTTPException(status_code=500, detail="An error occurred while reconciling the statement")
+    logger.info(f"Reconciling {reconciliation.counts['statement_lines']} statement lines against {reconciliation.counts['payments']} payments")
+    return StreamingResponse(reconciliation.report_stream(), media_type="text/csv", headers={"Content-Disposition": 'attachment; filename="reconciliation.csv"'},
+                             background=BackgroundTask(reconciliation.close))
@@ -0,0 +1,109 @@
+from fastapi import status,HTTPException,Depends,Request,Response
+from typing import List
+from App.schemas import BaseResponseModel, PolicyResponseSchema, PolicySchema, PolicyReadSchema, PolicyBatchResponseSchema
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Customer, Policy,Commission
+from App.utils import CurrentLoginVerification
+from datetime import datetime
+from fastapi import APIRouter
+from App.database import async_unit_of_work
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.commission_totals import increment_agent_commission_total_async
+from App.portfolio import increment_agent_portfolio_async
+from App.issuance import issue_policies_async, pricing_schemes_async
+from App.pricing import price_policies, commission_for
+from App.conditional import make_etag, check_not_modified
+from Core.settings import settings
+
+router = APIRouter()
+policy_fields = FieldSelection(PolicySchema, Policy)
+
+@router.post("/create_policy", status_code=status.HTTP_201_CREATED, response_model=PolicyResponseSchema)
+async def create_policy(policy_data: PolicySchema, db: AsyncSession = async_unit_of_work, current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user_async)):
+    schemes = await pricing_schemes_async(db, [policy_data.scheme_id])
+    if policy_data.scheme_id not in schemes:
+        raise HTTPException(status_code=404, detail="Enter correct Scheme id - Scheme not present")
+
+    premiums, loadings = price_policies(schemes, [policy_data.scheme_id], current_customer.date_of_birth)
+
+    policy_data_dict = policy_data.model_dump()
+    policy_data_dict['customer_id'] = current_customer.customer_id
+    policy_data_dict['date_issued'] = datetime.now().date()
+    policy_data_dict['premium'] = premiums[0]
+    policy_data_dict['age_loading'] = loadings[0]
+
+    new_policy = Policy(**policy_data_dict)
+    db.add(new_policy)
+    await db.flush()
+
+    commission_scheme=Commission(agent_id=current_customer.agent_id,policy_id=new_policy.policy_id,commission_amount=commission_for(new_policy.premium))
+    db.add(commission_scheme)
+    await increment_agent_commission_total_async(db, current_customer.agent_id, commission_scheme.commission_amount)
+    await increment_agent_portfolio_async(db, current_customer.agent_id, policies_issued=1, premium_change=new_policy.premium, commission=commission_scheme.commission_amount)
+    await db.flush()
+
+    return {"message": "Policy created successfully", "status": 201, "data": new_policy}
+
+@router.post("/create_policies", status_code=status.HTTP_201_CREATED, response_model=PolicyBatchResponseSchema)
+async def create_policies(policies: List[PolicySchema], db: AsyncSession = async_unit_of_work, current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user_async)):
+    if not policies:
+        raise HTTPException(status_code=400, detail="No policies to issue")
+    if len(policies) > settings.POLICY_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.POLICY_BATCH_MAX_ROWS} policies per request")
+    issued = await issue_policies_async(db, policies, current_customer)
+
+    return {"message": f"{len(issued)} Policies created successfully", "status": 201, "data": issued}
+
+@router.get("/read_policy/{policy_id}", response_model=PolicyResponseSchema, status_code=status.HTTP_200_OK)
+async def read_policy_by_id(policy_id: int, request: Request, response: Response, fields: tuple = Depends(policy_fields), db: AsyncSession = async_unit_of_work):
+    # Only the version column is read until we know the client's copy is stale.
+    row_version = await db.scalar(select(Policy.row_version).filter(Policy.policy_id == policy_id))
+    if row_version is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    not_modified = check_not_modified(request, response, make_etag("policy", policy_id, row_version, *fields))
+    if not_modified:
+        return not_modified
+    policy = (await db.execute(select(*policy_fields.columns(fields)).filter(Policy.policy_id == policy_id))).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+    return json_response(project_schema(PolicyResponseSchema, fields), {"message": f"Policy for PolicyID {policy_id} fetched successfully", "status": 200,"data":policy}, response)
+
+@router.put("/update_policy/{policy_id}", response_model=PolicyResponseSchema, status_code=status.HTTP_200_OK)
+async def update_policy_by_id(policy_id: int, policy_data: PolicySchema, db: AsyncSession = async_unit_of_work,current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user_async)):
+    policy = await db.get(Policy, policy_id)
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy  not found")
+    
+    new_policy = policy_data.model_dump(exclude_unset=True) 
+
+    for key, value in new_policy.items():
+        setattr(policy, key, value)
+    
+    await db.flush()
+
+    return {"message": f"Policy for PolicyID {policy_id} updated successfully", "status": 200, "data": new_policy}
+
+@router.delete("/delete_policy/{policy_id}", status_code=status.HTTP_200_OK, response_model=BaseResponseModel)
+async def delete_policy_by_id(policy_id: int, db: AsyncSession = async_unit_of_work,current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user_async)):
+    policy = await db.get(Policy, policy_id)
+    if not policy:
+        raise HTTPException(status_code=404, detail="policy not found")
+    
+    await db.delete(policy)
+    await db.flush()
+
+    return {"message": f"policy with PolicyID {policy_id} deleted successfully", "status": 200}
+
+@router.get("/read_policy", response_model=PolicyReadSchema, status_code=status.HTTP_200_OK)
+async def read_all_policy(page: PageParams = Depends(), fields: tuple = Depends(policy_fields), db: AsyncSession = async_unit_of_work):
+    result = await db.execute(page.apply(select(*policy_fields.columns(fields, Policy.policy_id)), Policy.policy_id))
+    policys = result.all()
+    if not policys:
+        raise HTTPException(status_code=404, detail="No Policy found")
+    policys, next_cursor = page.split(policys, Policy.policy_id)
+
+    return json_response(project_schema(PolicyReadSchema, fields), {"message": "All Policy fetched successfully", "status": 200, "data": policys, "next_cursor": next_cursor})
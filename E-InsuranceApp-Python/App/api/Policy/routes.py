@@ -1,117 +1,114 @@
-from fastapi import status,HTTPException,Depends
-from App.schemas import BaseResponseModel, PolicyResponseSchema, PolicySchema, PolicyReadSchema
+from fastapi import status,HTTPException,Depends,Request,Response
+from typing import List
+from App.schemas import BaseResponseModel, PolicyResponseSchema, PolicySchema, PolicyReadSchema, PolicyBatchResponseSchema
 from sqlalchemy.orm import Session
-from App.models import Customer,Scheme, Policy,Commission
+from App.models import Customer, Policy,Commission,Employee
 from App.utils import CurrentLoginVerification
 from datetime import datetime
 from fastapi import APIRouter
-from App.database import DataBaseConnection
+from App.database import unit_of_work
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.pagination import PageParams
+from App.commission_totals import increment_agent_commission_total
+from App.portfolio import increment_agent_portfolio
+from App.export import ExportParams, export_response
+from App.issuance import issue_policies, pricing_schemes
+from App.pricing import price_policies, commission_for
+from App.conditional import make_etag, check_not_modified
+from Core.settings import settings
 
 router = APIRouter()
+policy_fields = FieldSelection(PolicySchema, Policy)
 
 @router.post("/create_policy", status_code=status.HTTP_201_CREATED, response_model=PolicyResponseSchema)
-def create_policy(policy_data: PolicySchema, db: Session = Depends(DataBaseConnection.get_db_session), current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
-    try:
-        scheme = db.query(Scheme).filter(Scheme.scheme_id == policy_data.scheme_id).first()
-        if not scheme:
-            raise HTTPException(status_code=404, detail="Enter correct Scheme id - Scheme not present")
+def create_policy(policy_data: PolicySchema, db: Session = unit_of_work, current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
+    schemes = pricing_schemes(db, [policy_data.scheme_id])
+    if policy_data.scheme_id not in schemes:
+        raise HTTPException(status_code=404, detail="Enter correct Scheme id - Scheme not present")
 
-        premium = ((scheme.scheme_amount)/(scheme.scheme_tenure))*12
+    premiums, loadings = price_policies(schemes, [policy_data.scheme_id], current_customer.date_of_birth)
 
-        policy_data_dict = policy_data.model_dump()
-        policy_data_dict['customer_id'] = current_customer.customer_id
-        policy_data_dict['date_issued'] = datetime.now().date()
-        policy_data_dict['premium'] = premium
+    policy_data_dict = policy_data.model_dump()
+    policy_data_dict['customer_id'] = current_customer.customer_id
+    policy_data_dict['date_issued'] = datetime.now().date()
+    policy_data_dict['premium'] = premiums[0]
+    policy_data_dict['age_loading'] = loadings[0]
 
-        new_policy = Policy(**policy_data_dict)
-        db.add(new_policy)
-        db.commit()
-        db.refresh(new_policy)
+    new_policy = Policy(**policy_data_dict)
+    db.add(new_policy)
+    db.flush()
 
-        commission_scheme=Commission(agent_id=current_customer.agent_id,policy_id=new_policy.policy_id,commission_amount=((new_policy.premium)/4))
-        db.add(commission_scheme)
-        db.commit()
-        db.refresh(commission_scheme)
+    commission_scheme=Commission(agent_id=current_customer.agent_id,policy_id=new_policy.policy_id,commission_amount=commission_for(new_policy.premium))
+    db.add(commission_scheme)
+    increment_agent_commission_total(db, current_customer.agent_id, commission_scheme.commission_amount)
+    increment_agent_portfolio(db, current_customer.agent_id, policies_issued=1, premium_change=new_policy.premium, commission=commission_scheme.commission_amount)
+    db.flush()
 
-        return {"message": "Policy created successfully", "status": 201, "data": new_policy}
+    return {"message": "Policy created successfully", "status": 201, "data": new_policy}
 
-    except HTTPException as http_exc:
-        raise http_exc
+@router.post("/create_policies", status_code=status.HTTP_201_CREATED, response_model=PolicyBatchResponseSchema)
+def create_policies(policies: List[PolicySchema], db: Session = unit_of_work, current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
+    if not policies:
+        raise HTTPException(status_code=400, detail="No policies to issue")
+    if len(policies) > settings.POLICY_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.POLICY_BATCH_MAX_ROWS} policies per request")
+    issued = issue_policies(db, policies, current_customer)
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
+    return {"message": f"{len(issued)} Policies created successfully", "status": 201, "data": issued}
 
 @router.get("/read_policy/{policy_id}", response_model=PolicyResponseSchema, status_code=status.HTTP_200_OK)
-def read_policy_by_id(policy_id: int, db: Session = Depends(DataBaseConnection.get_db_session)):
-    try:
-        policy = db.query(Policy).filter(Policy.policy_id == policy_id).first()
-        if not policy:
-            raise HTTPException(status_code=404, detail="Policy not found")
+def read_policy_by_id(policy_id: int, request: Request, response: Response, fields: tuple = Depends(policy_fields), db: Session = unit_of_work):
+    # Only the version column is read until we know the client's copy is stale.
+    row_version = db.query(Policy.row_version).filter(Policy.policy_id == policy_id).scalar()
+    if row_version is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    not_modified = check_not_modified(request, response, make_etag("policy", policy_id, row_version, *fields))
+    if not_modified:
+        return not_modified
+    policy = db.query(*policy_fields.columns(fields)).filter(Policy.policy_id == policy_id).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+    return json_response(project_schema(PolicyResponseSchema, fields), {"message": f"Policy for PolicyID {policy_id} fetched successfully", "status": 200,"data":policy}, response)
 
-        return {"message": f"Policy for PolicyID {policy_id} fetched successfully", "status": 200,"data":policy}
-
-    except HTTPException as http_exc:
-        raise http_exc
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
-    
 @router.put("/update_policy/{policy_id}", response_model=PolicyResponseSchema, status_code=status.HTTP_200_OK)
-def update_policy_by_id(policy_id: int, policy_data: PolicySchema, db: Session = Depends(DataBaseConnection.get_db_session),current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
-    try:
-        policy = db.query(Policy).filter(Policy.policy_id == policy_id).first()
-        if not policy:
-            raise HTTPException(status_code=404, detail="Policy  not found")
-        
-        new_policy = policy_data.model_dump(exclude_unset=True) 
-
-        for key, value in new_policy.items():
-            setattr(policy, key, value)
-        
-        db.commit()
-        db.refresh(policy)
-
-        return {"message": f"Policy for PolicyID {policy_id} updated successfully", "status": 200, "data": new_policy}
+def update_policy_by_id(policy_id: int, policy_data: PolicySchema, db: Session = unit_of_work,current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
+    policy = db.query(Policy).filter(Policy.policy_id == policy_id).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy  not found")
+    
+    new_policy = policy_data.model_dump(exclude_unset=True) 
 
-    except HTTPException as http_exc:
-        raise http_exc
+    for key, value in new_policy.items():
+        setattr(policy, key, value)
+    
+    db.flush()
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
+    return {"message": f"Policy for PolicyID {policy_id} updated successfully", "status": 200, "data": new_policy}
 
 @router.delete("/delete_policy/{policy_id}", status_code=status.HTTP_200_OK, response_model=BaseResponseModel)
-def delete_policy_by_id(policy_id: int, db: Session = Depends(DataBaseConnection.get_db_session),current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
-    try:
-        policy = db.query(Policy).filter(Policy.policy_id == policy_id).first()
-        if not policy:
-            raise HTTPException(status_code=404, detail="policy not found")
-        
-        db.delete(policy)
-        db.commit()
-
-        return {"message": f"policy with PolicyID {policy_id} deleted successfully", "status": 200}
-
-    except HTTPException as http_exc:
-        raise http_exc
+def delete_policy_by_id(policy_id: int, db: Session = unit_of_work,current_customer: Customer = Depends(CurrentLoginVerification.get_current_customer_user)):
+    policy = db.query(Policy).filter(Policy.policy_id == policy_id).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="policy not found")
+    
+    db.delete(policy)
+    db.flush()
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
+    return {"message": f"policy with PolicyID {policy_id} deleted successfully", "status": 200}
 
 @router.get("/read_policy", response_model=PolicyReadSchema, status_code=status.HTTP_200_OK)
-def read_all_policy(db: Session = Depends(DataBaseConnection.get_db_session)):
-    try:
-        policys = db.query(Policy).all()
-        policys_data=[PolicySchema.from_orm(policy) for policy in policys]
-        if not policys:
-            raise HTTPException(status_code=404, detail="No Policy found")
+def read_all_policy(page: PageParams = Depends(), fields: tuple = Depends(policy_fields), db: Session = unit_of_work):
+    policys = page.apply(db.query(*policy_fields.columns(fields, Policy.policy_id)), Policy.policy_id).all()
+    if not policys:
+        raise HTTPException(status_code=404, detail="No Policy found")
+    policys, next_cursor = page.split(policys, Policy.policy_id)
 
-        return {"message": "All Policy fetched successfully", "status": 200, "data": policys_data}
+    return json_response(project_schema(PolicyReadSchema, fields), {"message": "All Policy fetched successfully", "status": 200, "data": policys, "next_cursor": next_cursor})
 
-    except HTTPException as http_exc:
-        raise http_exc
+POLICY_EXPORT_COLUMNS = [Policy.policy_id, Policy.customer_id, Policy.scheme_id, Policy.policy_details, Policy.premium, Policy.date_issued, Policy.maturity_period, Policy.policy_lapse_date, Policy.created_at]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error - {e}")
\ No newline at end of file
+@router.get("/export")
+def export_policies(params: ExportParams = Depends(), current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user)):
+    return export_response("policies", POLICY_EXPORT_COLUMNS, Policy.created_at, params)
@@ -0,0 +1,161 @@
+from fastapi import status,HTTPException,Depends,Request,Response
+from typing import List
+from App.schemas import SchemeSchema, SchemeResponseSchema, SchemeReadSchema, QuoteRequestSchema, QuoteResponseSchema, PremiumRecomputeJobResponseSchema, BaseResponseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Employee, Scheme, EmployeeScheme, PremiumRecomputeJob
+from App.utils import CurrentLoginVerification
+from App.database import async_unit_of_work, after_commit
+from App.serialization import json_response
+from App.projection import FieldSelection, project_schema
+from App.catalog import catalog_cache
+from App.pricing import quote, from_cents, to_cents
+from App.recompute import enqueue_recompute_async, premium_recompute
+from App.conditional import make_etag, check_not_modified
+from App.pagination import PageParams
+from Core.settings import settings
+from Core import loggers
+from fastapi import APIRouter
+from sqlalchemy.exc import SQLAlchemyError
+
+router = APIRouter()
+scheme_fields = FieldSelection(SchemeSchema, Scheme)
+
+logger = loggers.get_logger(__name__)
+
+@router.post("/create_scheme/", status_code = status.HTTP_201_CREATED, response_model = SchemeResponseSchema)
+async def create_scheme(scheme: SchemeSchema, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    logger.info("Creating Schemes...")  
+    new_scheme = Scheme(**scheme.model_dump())
+    try:
+        db.add(new_scheme)
+        await db.flush()
+
+        employee_scheme = EmployeeScheme(employee_id=current_user.employee_id, scheme_id=new_scheme.scheme_id)
+        db.add(employee_scheme)
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+
+    except SQLAlchemyError as e:
+        logger.exception("Scheme cannot be created")
+        raise HTTPException(status_code=500, detail="An error occurred while creating the Scheme")
+    logger.info("Scheme registered successfully")
+    return {"message": "Scheme created successfully", "status": status.HTTP_201_CREATED,"data": new_scheme}
+
+@router.get("/read_schemes/", response_model=SchemeReadSchema)
+async def read_schemes(request: Request, response: Response, page: PageParams = Depends(), fields: tuple = Depends(scheme_fields), db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        catalog = await catalog_cache.current_async(db)
+        not_modified = check_not_modified(request, response, make_etag("schemes", catalog.schemes_fingerprint, page.limit, page.after, *fields))
+        if not_modified:
+            return not_modified
+        schemes = page.slice(catalog.scheme_list, Scheme.scheme_id)
+        if not schemes:
+            logger.warning("Scheme Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scheme Not Found")
+        logger.info("Scheme Retrieved Successfully from Database")
+        read_schemes, next_cursor = page.split(schemes, Scheme.scheme_id)
+        return json_response(project_schema(SchemeReadSchema, fields), {"message": "Schemes read successfully", "status": status.HTTP_200_OK, "data": read_schemes, "next_cursor": next_cursor}, response)
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving schemes from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving schemes from database")
+
+@router.post("/quote", response_model=QuoteResponseSchema, status_code=status.HTTP_200_OK)
+async def quote_schemes(options: List[QuoteRequestSchema], db: AsyncSession = async_unit_of_work):
+    if not options:
+        raise HTTPException(status_code=400, detail="No options to quote")
+    if len(options) > settings.QUOTE_MAX_OPTIONS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {settings.QUOTE_MAX_OPTIONS} options per request")
+    schemes = (await catalog_cache.current_async(db)).schemes
+    tenures, ages, _, premiums = quote(schemes, [option.scheme_id for option in options], [option.tenure for option in options],
+                                       [option.date_of_birth for option in options])
+    quotes = [
+        {"scheme_id": option.scheme_id, "tenure": tenure, "age": age, "premium": from_cents(premium)}
+        for option, tenure, age, premium in zip(options, tenures.tolist(), ages.tolist(), premiums.tolist())
+    ]
+    return json_response(QuoteResponseSchema, {"message": f"{len(quotes)} options quoted", "status": status.HTTP_200_OK, "data": quotes})
+
+@router.get("/read_schemes_by_id/{scheme_id}/", response_model=SchemeResponseSchema)
+async def read_schemes_by_id(scheme_id:int,fields: tuple = Depends(scheme_fields),db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        schemes = (await catalog_cache.current_async(db)).schemes.get(scheme_id)
+        if not schemes:
+            logger.warning("Scheme Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="scheme Not Found")
+        logger.info("Schemes Retrieved Successfully from Database")
+        return json_response(project_schema(SchemeResponseSchema, fields), {"message": "Schemes read successfully", "status": status.HTTP_200_OK, "data": schemes})
+    
+    except HTTPException as e:
+        logger.error(f"Error retrieving Scheme from database: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error retrieving Scheme from database")
+
+@router.put("/update_scheme/{scheme_id}", response_model=SchemeResponseSchema)
+async def update_scheme(scheme_id: int, db_scheme: SchemeSchema, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    scheme = await db.get(Scheme, scheme_id)
+    if not scheme:
+        logger.warning("Plan Not Found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan Not Found")
+    
+    reprice = to_cents(scheme.scheme_amount) != to_cents(db_scheme.scheme_amount) or scheme.scheme_tenure != db_scheme.scheme_tenure
+    scheme.scheme_name = db_scheme.scheme_name
+    scheme.scheme_details = db_scheme.scheme_details
+    scheme.price = db_scheme.price
+    scheme.scheme_tenure = db_scheme.scheme_tenure
+    scheme.scheme_amount = db_scheme.scheme_amount
+    
+    try:
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+        if reprice:
+            # Existing policies are re-priced in the background once the new terms are committed.
+            job = await enqueue_recompute_async(db, scheme_id)
+            after_commit(db, premium_recompute.start, job.job_id)
+            logger.info(f"Premium recompute job {job.job_id} queued for scheme {scheme_id}")
+    except SQLAlchemyError as e:
+        logger.exception("scheme cannot be updated")
+        raise HTTPException(status_code=500, detail="An error occurred while updating the scheme")
+    return {"message": "scheme updated successfully", "status": 200, "data": scheme}
+
+@router.post("/{scheme_id}/recompute-premiums", response_model=PremiumRecomputeJobResponseSchema, status_code=status.HTTP_202_ACCEPTED)
+async def recompute_premiums(scheme_id: int, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    if await db.get(Scheme, scheme_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scheme Not Found")
+    job = await enqueue_recompute_async(db, scheme_id)
+    after_commit(db, premium_recompute.start, job.job_id)
+    return {"message": f"Premium recompute job {job.job_id} queued", "status": status.HTTP_202_ACCEPTED, "data": job}
+
+@router.get("/recompute-jobs/{job_id}", response_model=PremiumRecomputeJobResponseSchema)
+async def read_recompute_job(job_id: int, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    job = await db.get(PremiumRecomputeJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recompute job Not Found")
+    return {"message": f"Premium recompute job {job_id} is {job.status}", "status": status.HTTP_200_OK, "data": job}
+
+@router.post("/recompute-jobs/{job_id}/resume", response_model=PremiumRecomputeJobResponseSchema, status_code=status.HTTP_202_ACCEPTED)
+async def resume_recompute_job(job_id: int, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    job = await db.get(PremiumRecomputeJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recompute job Not Found")
+    if job.status == "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Premium recompute job {job_id} already finished")
+    after_commit(db, premium_recompute.start, job.job_id)
+    return {"message": f"Premium recompute job {job_id} resumed from policy {job.last_policy_id}", "status": status.HTTP_202_ACCEPTED, "data": job}
+
+@router.delete("/delet_scheme/{scheme_id}", response_model=BaseResponseModel)
+async def delete_scheme(scheme_id: int, db: AsyncSession = async_unit_of_work, current_user: Employee = Depends(CurrentLoginVerification.get_current_employee_user_async)):
+    try:
+        scheme = await db.get(Scheme, scheme_id)
+        if not scheme:
+            logger.warning("Scheme Not Found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scheme Not Found")
+        
+        await db.delete(scheme)
+        await db.flush()
+        after_commit(db, catalog_cache.invalidate)
+        
+        logger.info("Scheme Deleted Successfully")
+        return {"message":"Deleted","status":200}
+    
+    except HTTPException as e:
+        logger.error(f"Error deleting scheme: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting scheme")
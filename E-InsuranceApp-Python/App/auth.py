@@ -0,0 +1,110 @@
+from typing import Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import Admin, Employee, Agent, Customer, Principal
+from App.hashing import password_hasher
+from App.utils import UserRole
+from Core import loggers
+
+logger = loggers.get_logger(__name__)
+
+ROLE_MODELS = {
+    UserRole.admin: Admin,
+    UserRole.employee: Employee,
+    UserRole.agent: Agent,
+    UserRole.customer: Customer,
+}
+
+def _role_key(role: UserRole) -> Tuple[type, str]:
+    # Each role table is named after its relationship on Principal and keyed by "<table>_id".
+    model = ROLE_MODELS[UserRole(role)]
+    return model, f"{model.__tablename__}_id"
+
+
+class AuthService:
+    """Every credential check goes through the principal table, whatever the role."""
+
+    @staticmethod
+    def new_principal(role: UserRole, entity) -> Principal:
+        model, _ = _role_key(role)
+        return Principal(
+            role = UserRole(role).value,
+            username = entity.username,
+            email = entity.email,
+            password = entity.password,
+            **{model.__tablename__: entity}
+        )
+
+    @staticmethod
+    def principal_update(role: UserRole, entity):
+        _, key = _role_key(role)
+        return (
+            update(Principal)
+            .where(getattr(Principal, key) == getattr(entity, key))
+            .values(username = entity.username, email = entity.email, password = entity.password)
+        )
+
+    @staticmethod
+    def principal_delete(role: UserRole, entity):
+        _, key = _role_key(role)
+        return delete(Principal).where(getattr(Principal, key) == getattr(entity, key))
+
+    @staticmethod
+    def _principal_by_email(role: UserRole, email: str):
+        return select(Principal).filter(Principal.role == UserRole(role).value, Principal.email == email)
+
+    @staticmethod
+    def _user_by_username(role: UserRole, username: str):
+        model, key = _role_key(role)
+        return (
+            select(model)
+            .join(Principal, getattr(Principal, key) == getattr(model, key))
+            .filter(Principal.role == UserRole(role).value, Principal.username == username)
+        )
+
+    @staticmethod
+    def _rehash(role: UserRole, principal: Principal, new_hash: str):
+        # Keep the role table's copy of the hash in step with the credential row.
+        model, key = _role_key(role)
+        principal.password = new_hash
+        return update(model).where(getattr(model, key) == getattr(principal, key)).values(password = new_hash)
+
+    @staticmethod
+    def authenticate(db: Session, role: UserRole, email: str, password: str) -> Principal:
+        principal = db.execute(AuthService._principal_by_email(role, email)).scalars().first()
+        if not principal:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        verified, new_hash = password_hasher.verify_sync(password, principal.password)
+        if not verified:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        if new_hash:
+            logger.info("Rehashing password with the configured bcrypt cost")
+            db.execute(AuthService._rehash(role, principal, new_hash))
+            db.flush()
+        return principal
+
+    @staticmethod
+    async def authenticate_async(db: AsyncSession, role: UserRole, email: str, password: str) -> Principal:
+        result = await db.execute(AuthService._principal_by_email(role, email))
+        principal = result.scalars().first()
+        if not principal:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        verified, new_hash = await password_hasher.verify(password, principal.password)
+        if not verified:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        if new_hash:
+            logger.info("Rehashing password with the configured bcrypt cost")
+            await db.execute(AuthService._rehash(role, principal, new_hash))
+            await db.flush()
+        return principal
+
+    @staticmethod
+    def get_user(db: Session, role: UserRole, username: str):
+        return db.execute(AuthService._user_by_username(role, username)).scalars().first()
+
+    @staticmethod
+    async def get_user_async(db: AsyncSession, role: UserRole, username: str):
+        result = await db.execute(AuthService._user_by_username(role, username))
+        return result.scalars().first()
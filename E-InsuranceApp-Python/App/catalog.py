@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.models import InsurancePlan, Scheme
+from Core.settings import settings
+
+class CatalogSnapshot:
+    """Immutable view of every plan and scheme, keyed by id and ordered by id."""
+
+    def __init__(self, version: int, plans: Dict[int, object], schemes: Dict[int, object]):
+        self.version = version
+        self.plans = plans
+        self.schemes = schemes
+        self.plan_list: List[object] = list(plans.values())
+        self.scheme_list: List[object] = list(schemes.values())
+        self.loaded_at = time.monotonic()
+        # Content hashes rather than the version counter, which is per process:
+        # every worker holding the same rows derives the same ETags.
+        self.plans_fingerprint = self._fingerprint(self.plan_list)
+        self.schemes_fingerprint = self._fingerprint(self.scheme_list)
+
+    @staticmethod
+    def _fingerprint(rows) -> str:
+        digest = hashlib.sha256()
+        for row in rows:
+            digest.update(repr(tuple(row)).encode())
+        return digest.hexdigest()
+
+
+class CatalogCache:
+    """Read-through cache of the plan and scheme catalog.
+
+    Writers call invalidate() once their change has committed, which bumps the
+    version; the next reader reloads the whole catalog. The TTL bounds how long
+    another worker process can serve a catalog changed elsewhere.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.version == self.version and time.monotonic() - snapshot.loaded_at < self.ttl:
+                self.hits += 1
+                return snapshot
+            return None
+
+    def _load(self, db: Session) -> CatalogSnapshot:
+        # The lock is never held across the queries, so async callers cannot block the event loop on it.
+        with self.lock:
+            version = self.version
+        plans = {row.plan_id: row for row in db.execute(select(InsurancePlan.__table__).order_by(InsurancePlan.plan_id))}
+        schemes = {row.scheme_id: row for row in db.execute(select(Scheme.__table__).order_by(Scheme.scheme_id))}
+        snapshot = CatalogSnapshot(version, plans, schemes)
+        with self.lock:
+            self.loads += 1
+            if version == self.version:
+                self.snapshot = snapshot
+        return snapshot
+
+    def current(self, db: Session) -> CatalogSnapshot:
+        return self._fresh() or self._load(db)
+
+    async def current_async(self, db: AsyncSession) -> CatalogSnapshot:
+        return self._fresh() or await db.run_sync(self._load)
+
+    def invalidate(self):
+        with self.lock:
+            self.version += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            snapshot = self.snapshot
+            return {
+                "version": self.version,
+                "plans": len(snapshot.plans) if snapshot else 0,
+                "schemes": len(snapshot.schemes) if snapshot else 0,
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+catalog_cache = CatalogCache(ttl=settings.CATALOG_CACHE_TTL)
@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from App.database import engine
+from App.models import AgentCommissionTotal
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert, "mysql": mysql.insert, "mariadb": mysql.insert}
+
+def build_increment_statement(agent_id: int, amount, count: int = 1):
+    """Build a single-statement upsert that adds `amount` to an agent's running commission total.
+
+    Returns None on backends without a native upsert; callers then fall back to
+    UPDATE followed by INSERT.
+    """
+    insert = UPSERT_DIALECTS.get(engine.dialect.name)
+    if insert is None:
+        return None
+    now = datetime.now()
+    stmt = insert(AgentCommissionTotal).values(agent_id=agent_id, total_commission=amount, commission_count=count, updated_at=now)
+    increments = {
+        "total_commission": AgentCommissionTotal.total_commission + amount,
+        "commission_count": AgentCommissionTotal.commission_count + count,
+        "updated_at": now,
+    }
+    if engine.dialect.name in ("mysql", "mariadb"):
+        return stmt.on_duplicate_key_update(**increments)
+    return stmt.on_conflict_do_update(index_elements=[AgentCommissionTotal.agent_id], set_=increments)
+
+def _build_fallback_update(agent_id: int, amount, count: int):
+    return (
+        update(AgentCommissionTotal)
+        .where(AgentCommissionTotal.agent_id == agent_id)
+        .values(total_commission=AgentCommissionTotal.total_commission + amount,
+                commission_count=AgentCommissionTotal.commission_count + count,
+                updated_at=datetime.now())
+    )
+
+def increment_agent_commission_total(db, agent_id: int, amount, count: int = 1):
+    """Apply the increment inside the caller's transaction; it commits with the Commission row."""
+    stmt = build_increment_statement(agent_id, amount, count)
+    if stmt is not None:
+        db.execute(stmt)
+    elif db.execute(_build_fallback_update(agent_id, amount, count)).rowcount == 0:
+        db.add(AgentCommissionTotal(agent_id=agent_id, total_commission=amount, commission_count=count))
+
+async def increment_agent_commission_total_async(db, agent_id: int, amount, count: int = 1):
+    stmt = build_increment_statement(agent_id, amount, count)
+    if stmt is not None:
+        await db.execute(stmt)
+    elif (await db.execute(_build_fallback_update(agent_id, amount, count))).rowcount == 0:
+        db.add(AgentCommissionTotal(agent_id=agent_id, total_commission=amount, commission_count=count))
@@ -0,0 +1,23 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the parts that determine a representation."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison, so a W/ prefix from an intermediary still matches.
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def check_not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a bodiless 304 when the client already holds `etag`; otherwise tag the outgoing response."""
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -1,15 +1,194 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from fastapi import Depends, HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from Core.settings import settings
+from Core import loggers
 
+logger = loggers.get_logger(__name__)
 
-engine = create_engine(settings.DB_URL)
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+def get_async_db_url():
+    if settings.ASYNC_DB_URL:
+        return settings.ASYNC_DB_URL
+    url = make_url(settings.DB_URL)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}', set ASYNC_DB_URL explicitly")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, elapsed: float, timed_out: bool = False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_time_total += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    def snapshot(self, pool) -> dict:
+        with self.lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self.wait_time_total * 1000 / attempts, 3) if attempts else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+class MeteredPoolMixin:
+    """Times every connection checkout, including the wait for a free slot."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def get_pool_options():
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+def create_db_engine(url: str = None):
+    return create_engine(url or settings.DB_URL, poolclass=MeteredQueuePool, **get_pool_options())
+
+def create_async_db_engine(url: str = None):
+    return create_async_engine(url or get_async_db_url(), poolclass=MeteredAsyncAdaptedQueuePool, **get_pool_options())
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine() if settings.DB_ASYNC else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+def get_pool_metrics() -> dict:
+    metrics = {"sync": engine.pool.metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        metrics["async"] = async_engine.pool.metrics.snapshot(async_engine.pool)
+    return metrics
+
+def after_commit(db, fn, *args):
+    """Run `fn(*args)` once the request's unit of work has committed; dropped on rollback."""
+    db.info.setdefault("after_commit", []).append((fn, args))
+
+def _run_after_commit(db):
+    for fn, args in db.info.pop("after_commit", []):
+        fn(*args)
+
+def _returns_ids_in_order(db) -> bool:
+    return db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order
+
+def insert_returning_ids(db, model, pk_col, rows: list) -> list:
+    """Insert `rows` in one statement and return their generated keys in the order of `rows`."""
+    if _returns_ids_in_order(db):
+        stmt = insert(model).returning(pk_col, sort_by_parameter_order=True)
+        return list(db.execute(stmt, rows).scalars())
+    # No executemany RETURNING on this backend (MySQL): let the ORM flush fetch each generated key.
+    entities = [model(**row) for row in rows]
+    db.add_all(entities)
+    db.flush()
+    return [getattr(entity, pk_col.key) for entity in entities]
+
+async def insert_returning_ids_async(db, model, pk_col, rows: list) -> list:
+    if _returns_ids_in_order(db):
+        stmt = insert(model).returning(pk_col, sort_by_parameter_order=True)
+        return list((await db.execute(stmt, rows)).scalars())
+    entities = [model(**row) for row in rows]
+    db.add_all(entities)
+    await db.flush()
+    return [getattr(entity, pk_col.key) for entity in entities]
+
 class DataBaseConnection:
     def get_db_session():
         db = SessionLocal()
         try:
             yield db
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+    async def get_async_db_session():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    def get_unit_of_work():
+        """One session and one transaction per request: handlers flush, the request commits once."""
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            yield db
+            db.commit()
+            _run_after_commit(db)
+        except SQLAlchemyError:
+            logger.exception("Unit of work failed, rolling back")
+            db.rollback()
+            raise HTTPException(status_code=500, detail="An error occurred while saving changes")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def get_async_unit_of_work():
+        async with AsyncSessionLocal() as db:
+            try:
+                yield db
+                await db.commit()
+                _run_after_commit(db)
+            except SQLAlchemyError:
+                logger.exception("Unit of work failed, rolling back")
+                await db.rollback()
+                raise HTTPException(status_code=500, detail="An error occurred while saving changes")
+            except Exception:
+                await db.rollback()
+                raise
+
+# Function scope runs the commit before the response is serialized and sent,
+# so a failed commit reaches the client as a 500 instead of being lost.
+unit_of_work = Depends(DataBaseConnection.get_unit_of_work, scope="function")
+async_unit_of_work = Depends(DataBaseConnection.get_async_unit_of_work, scope="function")
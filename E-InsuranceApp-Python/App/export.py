@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from App.database import SessionLocal
+from Core.settings import settings
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+class ExportParams:
+    def __init__(self, export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+                 created_from: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+                 created_to: Optional[datetime] = Query(None, description="Only rows created before this time"),
+                 gzip: bool = Query(False, description="Compress the stream with gzip on the fly")):
+        self.export_format = export_format
+        self.created_from = created_from
+        self.created_to = created_to
+        self.gzip = gzip
+
+def _to_json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def iter_export_rows(columns, created_column, params: ExportParams):
+    """Yield the export one server-side cursor batch at a time, so memory stays bounded by the batch size."""
+    names = [column.key for column in columns]
+    stmt = select(*columns).order_by(columns[0])
+    if params.created_from is not None:
+        stmt = stmt.filter(created_column >= params.created_from)
+    if params.created_to is not None:
+        stmt = stmt.filter(created_column < params.created_to)
+
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        if params.export_format == ExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+        for partition in result.partitions():
+            buffer = io.StringIO()
+            if params.export_format == ExportFormat.csv:
+                writer = csv.writer(buffer)
+                writer.writerows(partition)
+            else:
+                for row in partition:
+                    buffer.write(json.dumps({name: _to_json_value(value) for name, value in zip(names, row)}))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_response(name: str, columns, created_column, params: ExportParams) -> StreamingResponse:
+    body = iter_export_rows(columns, created_column, params)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{params.export_format.value}"'}
+    if params.gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[params.export_format], headers=headers)
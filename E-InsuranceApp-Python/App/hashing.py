@@ -0,0 +1,99 @@
+import asyncio
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from Core.settings import settings
+
+# Pinning min/max rounds to the configured cost makes passlib flag any stored
+# hash with a different cost, so it is rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def verify_and_update(raw_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(raw_password, hashed_password)
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so request workers never burn CPU on it."""
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self.executor
+
+    def _acquire(self):
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Password hashing service is busy, retry shortly")
+            self.in_flight += 1
+
+    def _release(self, _future=None):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _submit(self, fn, *args):
+        executor = self._get_executor()
+        self._acquire()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _chunks(self, passwords: List[str]) -> List[List[str]]:
+        # One contiguous chunk per worker keeps every process busy with a single round trip each.
+        size = max(1, math.ceil(len(passwords) / self.workers))
+        return [passwords[i:i + size] for i in range(0, len(passwords), size)]
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def verify(self, raw_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self._submit(verify_and_update, raw_password, hashed_password))
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        futures = [asyncio.wrap_future(self._submit(hash_passwords, chunk)) for chunk in self._chunks(passwords)]
+        return [hashed for chunk in await asyncio.gather(*futures) for hashed in chunk]
+
+    def hash_sync(self, password: str) -> str:
+        return self._submit(hash_password, password).result()
+
+    def hash_many_sync(self, passwords: List[str]) -> List[str]:
+        futures = [self._submit(hash_passwords, chunk) for chunk in self._chunks(passwords)]
+        return [hashed for future in futures for hashed in future.result()]
+
+    def verify_sync(self, raw_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._submit(verify_and_update, raw_password, hashed_password).result()
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(workers=settings.HASH_WORKERS, queue_depth=settings.HASH_QUEUE_DEPTH)
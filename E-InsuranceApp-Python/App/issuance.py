@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import insert, select
+from App.models import Commission, Customer, Policy, Scheme
+from App.database import insert_returning_ids, insert_returning_ids_async
+from App.schemas import PolicySchema
+from App.commission_totals import increment_agent_commission_total, increment_agent_commission_total_async
+from App.portfolio import increment_agent_portfolio, increment_agent_portfolio_async
+from App.pricing import price_policies, commission_for
+
+def _pricing_schemes_query(scheme_ids: List[int]):
+    # Read in the issuing transaction rather than from the catalog cache, and share-locked: a concurrent
+    # scheme update either waits for these policies to commit, so its recompute job covers them, or
+    # commits first and its new terms are what is read here.
+    return select(Scheme.__table__).where(Scheme.scheme_id.in_(set(scheme_ids))).with_for_update(read=True)
+
+def pricing_schemes(db, scheme_ids: List[int]) -> Dict[int, object]:
+    """The current terms of the given schemes, keyed by id, as the policies are priced from them."""
+    return {row.scheme_id: row for row in db.execute(_pricing_schemes_query(scheme_ids))}
+
+async def pricing_schemes_async(db, scheme_ids: List[int]) -> Dict[int, object]:
+    return {row.scheme_id: row for row in await db.execute(_pricing_schemes_query(scheme_ids))}
+
+def build_policy_rows(policies: List[PolicySchema], schemes: Dict[int, tuple], customer: Customer) -> List[dict]:
+    """Price every policy in the batch; any unknown scheme rejects the whole batch."""
+    premiums, loadings = price_policies(schemes, [policy.scheme_id for policy in policies], customer.date_of_birth)
+    today = datetime.now().date()
+    return [
+        {**policy.model_dump(), "customer_id": customer.customer_id, "date_issued": today, "premium": premium, "age_loading": loading, "created_at": datetime.now()}
+        for policy, premium, loading in zip(policies, premiums, loadings)
+    ]
+
+def build_commission_rows(policy_rows: List[dict], policy_ids: List[int], agent_id: int) -> List[dict]:
+    return [
+        {"agent_id": agent_id, "policy_id": policy_id, "commission_amount": commission_for(row["premium"]), "created_at": datetime.now()}
+        for row, policy_id in zip(policy_rows, policy_ids)
+    ]
+
+def _issued(policy_rows: List[dict], policy_ids: List[int], commission_rows: List[dict]) -> List[dict]:
+    return [
+        {"policy_id": policy_id, "scheme_id": row["scheme_id"], "premium": row["premium"], "commission_amount": commission["commission_amount"]}
+        for row, policy_id, commission in zip(policy_rows, policy_ids, commission_rows)
+    ]
+
+def _portfolio_deltas(policy_rows: List[dict], commission_rows: List[dict]) -> dict:
+    return {"policies_issued": len(policy_rows), "premium_change": sum(row["premium"] for row in policy_rows),
+            "commission": sum(row["commission_amount"] for row in commission_rows)}
+
+def issue_policies(db, policies: List[PolicySchema], customer: Customer) -> List[dict]:
+    """Insert the policies and their commissions in the caller's transaction; the caller commits."""
+    schemes = pricing_schemes(db, [policy.scheme_id for policy in policies])
+    policy_rows = build_policy_rows(policies, schemes, customer)
+    policy_ids = insert_returning_ids(db, Policy, Policy.policy_id, policy_rows)
+    commission_rows = build_commission_rows(policy_rows, policy_ids, customer.agent_id)
+    db.execute(insert(Commission), commission_rows)
+    increment_agent_commission_total(db, customer.agent_id, sum(row["commission_amount"] for row in commission_rows), count=len(commission_rows))
+    increment_agent_portfolio(db, customer.agent_id, **_portfolio_deltas(policy_rows, commission_rows))
+    return _issued(policy_rows, policy_ids, commission_rows)
+
+async def issue_policies_async(db, policies: List[PolicySchema], customer: Customer) -> List[dict]:
+    schemes = await pricing_schemes_async(db, [policy.scheme_id for policy in policies])
+    policy_rows = build_policy_rows(policies, schemes, customer)
+    policy_ids = await insert_returning_ids_async(db, Policy, Policy.policy_id, policy_rows)
+    commission_rows = build_commission_rows(policy_rows, policy_ids, customer.agent_id)
+    await db.execute(insert(Commission), commission_rows)
+    await increment_agent_commission_total_async(db, customer.agent_id, sum(row["commission_amount"] for row in commission_rows), count=len(commission_rows))
+    await increment_agent_portfolio_async(db, customer.agent_id, **_portfolio_deltas(policy_rows, commission_rows))
+    return _issued(policy_rows, policy_ids, commission_rows)
@@ -0,0 +1,160 @@
+import argparse
+import calendar
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from sqlalchemy import insert, select, update
+from App.database import SessionLocal
+from App.models import Customer, EmailOutbox, Policy, PolicyStatusHistory
+from App.portfolio import increment_agent_portfolios
+from Core.settings import settings
+from Core import loggers
+
+logger = loggers.get_logger(__name__)
+
+NOTICES = {
+    "matured": ("Your policy has matured", "Dear {fullname},\n\nYour policy {policy_id} reached its maturity on {lapse_date}."),
+    "lapsed": ("Your policy has lapsed", "Dear {fullname},\n\nYour policy {policy_id} lapsed on {lapse_date} before reaching its maturity."),
+}
+
+def maturity_date(date_issued: date, maturity_period: int) -> date:
+    """The date a policy matures, `maturity_period` months after it was issued."""
+    months = date_issued.month - 1 + maturity_period
+    year, month = date_issued.year + months // 12, months % 12 + 1
+    return date(year, month, min(date_issued.day, calendar.monthrange(year, month)[1]))
+
+def outcome(date_issued: date, maturity_period: int, policy_lapse_date: date) -> str:
+    return "matured" if maturity_date(date_issued, maturity_period) <= policy_lapse_date else "lapsed"
+
+
+class PolicyLifecycleProcessor:
+    """Moves active policies whose lapse date has passed to matured or lapsed.
+
+    Due policies are claimed in chunks straight off the (status, policy_lapse_date)
+    index, so every claim is a short range scan from the front of the active range
+    and a run costs the same per policy however many there are. A chunk's status
+    UPDATEs, its history rows and its notices commit together; a processed policy
+    is no longer active, so a run that crashes simply picks up where it stopped.
+    """
+
+    def __init__(self, chunk_size: int = settings.POLICY_LIFECYCLE_CHUNK_SIZE, workers: int = settings.POLICY_LIFECYCLE_WORKERS,
+                 interval: float = settings.POLICY_LIFECYCLE_INTERVAL):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _claim(self, db, today: date):
+        return db.execute(
+            select(Policy.policy_id, Policy.date_issued, Policy.maturity_period, Policy.policy_lapse_date, Policy.premium,
+                   Customer.agent_id, Customer.email, Customer.fullname)
+            .join(Customer, Customer.customer_id == Policy.customer_id)
+            .where(Policy.status == "active", Policy.policy_lapse_date <= today)
+            .order_by(Policy.policy_lapse_date, Policy.policy_id)
+            .limit(self.chunk_size)
+            .with_for_update(of=Policy, skip_locked=True)
+        ).all()
+
+    def run_chunk(self, db, today: date) -> int:
+        """Settle one chunk of due policies and return its size; 0 once none are left. The caller commits."""
+        rows = self._claim(db, today)
+        if not rows:
+            return 0
+        outcomes = {"matured": [], "lapsed": []}
+        for row in rows:
+            outcomes[outcome(row.date_issued, row.maturity_period, row.policy_lapse_date)].append(row)
+        settled = 0
+        for to_status, chunk in outcomes.items():
+            if chunk:
+                # The status guard keeps a policy from being settled twice where SKIP LOCKED is not supported.
+                settled += db.execute(
+                    update(Policy)
+                    .where(Policy.policy_id.in_([row.policy_id for row in chunk]), Policy.status == "active")
+                    .values(status=to_status, row_version=Policy.row_version + 1)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+        if settled != len(rows):
+            raise RuntimeError("Policies in the chunk were settled concurrently")
+        now = datetime.now()
+        db.execute(insert(PolicyStatusHistory), [
+            {"policy_id": row.policy_id, "from_status": "active", "to_status": to_status, "changed_at": now}
+            for to_status, chunk in outcomes.items() for row in chunk
+        ])
+        db.execute(insert(EmailOutbox), [
+            {"to_email": row.email, "subject": NOTICES[to_status][0], "created_at": now, "next_attempt_at": now,
+             "body": NOTICES[to_status][1].format(fullname=row.fullname, policy_id=row.policy_id, lapse_date=row.policy_lapse_date)}
+            for to_status, chunk in outcomes.items() for row in chunk
+        ])
+        closed = defaultdict(lambda: {"policies_closed": 0, "premium_change": 0})
+        for row in rows:
+            closed[row.agent_id]["policies_closed"] += 1
+            closed[row.agent_id]["premium_change"] -= row.premium
+        increment_agent_portfolios(db, closed)
+        return len(rows)
+
+    def _work(self, today: date) -> int:
+        processed = 0
+        while not self.stop_event.is_set():
+            with SessionLocal() as db:
+                try:
+                    settled = self.run_chunk(db, today)
+                    db.commit()
+                except RuntimeError as e:
+                    # Lost a race with another worker; its chunk is settled, claim the next one.
+                    db.rollback()
+                    logger.warning(f"Policy lifecycle chunk retried: {e}")
+                    continue
+            if not settled:
+                break
+            processed += settled
+        return processed
+
+    def run_once(self, today: date = None) -> int:
+        """Settle every policy due by `today` across the worker pool and return how many were processed."""
+        today = today or date.today()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="policy-lifecycle") as pool:
+            processed = sum(pool.map(self._work, [today] * self.workers))
+        logger.info(f"Policy lifecycle run for {today}: {processed} policies settled")
+        return processed
+
+    def run_forever(self):
+        logger.info("Policy lifecycle processor started")
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Policy lifecycle run failed")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run_forever, name="policy-lifecycle", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+policy_lifecycle = PolicyLifecycleProcessor()
+
+def main():
+    parser = argparse.ArgumentParser(description="Settle policies whose lapse date has passed as matured or lapsed.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="settle policies due on or before this date (default today)")
+    parser.add_argument("--chunk-size", type=int, default=settings.POLICY_LIFECYCLE_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=settings.POLICY_LIFECYCLE_WORKERS)
+    parser.add_argument("--forever", action="store_true", help="settle due policies every POLICY_LIFECYCLE_INTERVAL seconds until stopped")
+    args = parser.parse_args()
+    processor = PolicyLifecycleProcessor(chunk_size=args.chunk_size, workers=args.workers)
+    if args.forever:
+        processor.run_forever()
+        return
+    processed = processor.run_once(args.date)
+    print(f"{processed} policies settled")
+
+if __name__ == "__main__":
+    main()
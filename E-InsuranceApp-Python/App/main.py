@@ -1,22 +1,57 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter
+from Core.settings import settings
+from App.hashing import password_hasher
+from App.outbox import outbox_worker
+from App.lifecycle import policy_lifecycle
+from App.catalog import catalog_cache
+from App.database import SessionLocal
 from App.api.Admin.routes import router as admin_router
-from App.api.Login.routes import router as login_router
-from App.api.Customer.routes import router as customer_router
-from App.api.Employee.routes import router as employee_router
-from App.api.Agent.routes import router as agent_router
-from App.api.InsurancePlan.routes import router as insuranceplan_router
-from App.api.Scheme.routes import router as scheme_router
-from App.api.Policy.routes import router as policy_router
-from App.api.Commission.routes import router as commission_router
+from App.api.Login import routes as login_routes, async_routes as login_async_routes
+from App.api.Customer import routes as customer_routes, async_routes as customer_async_routes
+from App.api.Employee import routes as employee_routes, async_routes as employee_async_routes
+from App.api.Agent import routes as agent_routes, async_routes as agent_async_routes
+from App.api.InsurancePlan import routes as insuranceplan_routes, async_routes as insuranceplan_async_routes
+from App.api.Scheme import routes as scheme_routes, async_routes as scheme_async_routes
+from App.api.Policy import routes as policy_routes, async_routes as policy_async_routes
+from App.api.Commission import routes as commission_routes, async_routes as commission_async_routes
+from App.api.Payment import routes as payment_routes, async_routes as payment_async_routes
 
-app=FastAPI()
+def select_router(sync_routes, async_routes):
+    # With DB_ASYNC enabled the async handlers are served, and any sync handler
+    # that has no async counterpart stays reachable on its usual path.
+    if not settings.DB_ASYNC:
+        return sync_routes.router
+    router = APIRouter(routes=list(async_routes.router.routes))
+    served = {(route.path, method) for route in async_routes.router.routes for method in route.methods}
+    for route in sync_routes.router.routes:
+        if not any((route.path, method) in served for method in route.methods):
+            router.routes.append(route)
+    return router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+    if settings.POLICY_LIFECYCLE_ENABLED:
+        policy_lifecycle.start()
+    if settings.CATALOG_PREWARM:
+        with SessionLocal() as db:
+            catalog_cache.current(db)
+    yield
+    policy_lifecycle.stop()
+    outbox_worker.stop()
+    password_hasher.shutdown()
+
+app=FastAPI(lifespan=lifespan)
 
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
-app.include_router(login_router,prefix="/login",tags=["Login"])
-app.include_router(customer_router,prefix="/customer",tags=["Customer"])
-app.include_router(employee_router,prefix="/employee",tags=["Employee"])
-app.include_router(agent_router,prefix="/agent",tags=["Agent"])
-app.include_router(insuranceplan_router,prefix="/insuranceplan",tags=["InsurancePlan"])
-app.include_router(scheme_router,prefix="/scheme",tags=["Scheme"])
-app.include_router(policy_router,prefix="/policy",tags=["Policy"])
-app.include_router(commission_router,prefix="/commission",tags=["Commission"])
\ No newline at end of file
+app.include_router(select_router(login_routes, login_async_routes),prefix="/login",tags=["Login"])
+app.include_router(select_router(customer_routes, customer_async_routes),prefix="/customer",tags=["Customer"])
+app.include_router(select_router(employee_routes, employee_async_routes),prefix="/employee",tags=["Employee"])
+app.include_router(select_router(agent_routes, agent_async_routes),prefix="/agent",tags=["Agent"])
+app.include_router(select_router(insuranceplan_routes, insuranceplan_async_routes),prefix="/insuranceplan",tags=["InsurancePlan"])
+app.include_router(select_router(scheme_routes, scheme_async_routes),prefix="/scheme",tags=["Scheme"])
+app.include_router(select_router(policy_routes, policy_async_routes),prefix="/policy",tags=["Policy"])
+app.include_router(select_router(commission_routes, commission_async_routes),prefix="/commission",tags=["Commission"])
+app.include_router(select_router(payment_routes, payment_async_routes),prefix="/payment",tags=["Payment"])
@@ -1,54 +1,42 @@
 from typing import List
 from typing import Optional
-from sqlalchemy import ForeignKey
-from sqlalchemy import String, Integer, create_engine , DECIMAL, BigInteger,DateTime,Date, Text
-from sqlalchemy.orm import DeclarativeBase, declarative_base, sessionmaker
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy import String, Integer, DECIMAL, BigInteger,DateTime,Date, Text
+from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
-from Core.settings import settings
 from datetime import datetime,date
 
-engine = create_engine(url = settings.DB_URL)
-
-session = sessionmaker(bind = engine, autoflush = False, autocommit = False)
-
-def get_db_session():
-    db = session()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class Base(DeclarativeBase):
     pass
 
 class Admin(Base):
     __tablename__ = "admin"
     admin_id:Mapped[int] = mapped_column(BigInteger, autoincrement = True, index = True, primary_key = True)
-    username:Mapped[str] = mapped_column(String(length = 50),nullable=False)
+    username:Mapped[str] = mapped_column(String(length = 50),nullable=False, unique = True, index = True)
     password:Mapped[str] = mapped_column(String(length=255),nullable=False)
     fullname:Mapped[str] = mapped_column(String(length=100),nullable=False)
-    email:Mapped[str] = mapped_column(String(length=100),nullable=False)
+    email:Mapped[str] = mapped_column(String(length=100),nullable=False, index=True)
     created_at:Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
     
 class Employee(Base):
     __tablename__ = "employee"
     employee_id:Mapped[int] = mapped_column(BigInteger, autoincrement = True, index = True, primary_key = True)
-    username:Mapped[str] = mapped_column(String(length = 50),nullable=False)
+    username:Mapped[str] = mapped_column(String(length = 50),nullable=False, unique = True, index = True)
     password:Mapped[str] = mapped_column(String(length=255),nullable=False)
     fullname:Mapped[str] = mapped_column(String(length=100),nullable=False)
-    email:Mapped[str] = mapped_column(String(length=100),nullable=False)
+    email:Mapped[str] = mapped_column(String(length=100),nullable=False, index=True)
     role:Mapped[str] = mapped_column(String(length=50),nullable=False)
     created_at:Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
 
 class Agent(Base):
     __tablename__ = "agent"
     agent_id: Mapped[int] = mapped_column(BigInteger, autoincrement=True, index=True, primary_key=True)
-    username:Mapped[str]= mapped_column(String(length=50), nullable=False)
+    username:Mapped[str]= mapped_column(String(length=50), nullable=False, unique=True, index=True)
     password:Mapped[str] = mapped_column(String(length=255), nullable=False)
     fullname:Mapped[str] = mapped_column(String(length=100), nullable=False)
-    email:Mapped[str] = mapped_column(String(length=100), nullable=False)
+    email:Mapped[str] = mapped_column(String(length=100), nullable=False, index=True)
     created_at:Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
     # Define the relationship to Customer (one-to-many)
@@ -58,13 +46,13 @@ class Agent(Base):
 class Customer(Base):
     __tablename__ = "customer"
     customer_id:Mapped[int] = mapped_column(BigInteger, autoincrement=True, index=True, primary_key=True)
-    username:Mapped[str] = mapped_column(String(length=50), nullable=False)
+    username:Mapped[str] = mapped_column(String(length=50), nullable=False, unique=True, index=True)
     password:Mapped[str] = mapped_column(String(length=255), nullable=False)
     fullname:Mapped[str] = mapped_column(String(length=100), nullable=False)
-    email:Mapped[str] = mapped_column(String(length=100), nullable=False)
+    email:Mapped[str] = mapped_column(String(length=100), nullable=False, index=True)
     phone_number:Mapped[str] = mapped_column(String(length=15), nullable=False)
     date_of_birth:Mapped[date] = mapped_column(Date, nullable=False)
-    agent_id:Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), nullable=False)
+    agent_id:Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), nullable=False, index=True)
     created_at:Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
     # Define the relationship to Agent (many-to-one)
@@ -86,7 +74,7 @@ class Scheme(Base):
     scheme_details: Mapped[str] = mapped_column(Text, nullable = False)
     plan_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('insuranceplan.plan_id'), nullable = False)
     price: Mapped[float] = mapped_column(DECIMAL(10,2), nullable = False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
     scheme_tenure:Mapped[int] = mapped_column(Integer, nullable=False)
     scheme_amount: Mapped[float] = mapped_column(DECIMAL(10, 2), nullable = False)
     
@@ -96,27 +84,38 @@ class Scheme(Base):
 
 class Policy(Base):
     __tablename__ = "policy"
+    # Due policies are found by an index range scan over the active ones' lapse dates.
+    __table_args__ = (Index("ix_policy_status_lapse_date", "status", "policy_lapse_date"),)
     policy_id:Mapped[int] = mapped_column(BigInteger, primary_key = True, index = True, autoincrement = True)
-    customer_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("customer.customer_id"), nullable = False)
-    scheme_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('scheme.scheme_id'), nullable = False)
+    customer_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("customer.customer_id"), nullable = False, index = True)
+    scheme_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('scheme.scheme_id'), nullable = False, index = True)
     policy_details: Mapped[str] = mapped_column(Text, nullable = False)
     premium: Mapped[float] = mapped_column(DECIMAL(10, 2), nullable = False)
     date_issued: Mapped[date] = mapped_column(Date, nullable = False)
     maturity_period: Mapped[int] = mapped_column(Integer, nullable = False)
     policy_lapse_date: Mapped[date] = mapped_column(Date, nullable = False)
-    created_at:Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
+    created_at:Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
+    row_version: Mapped[int] = mapped_column(Integer, nullable = False, server_default = "1")
+    # Age loading in basis points applied when the policy was issued, kept so it can be re-priced.
+    age_loading: Mapped[int] = mapped_column(Integer, nullable = False, server_default = "0")
+    status: Mapped[str] = mapped_column(String(length = 20), nullable = False, default = "active", server_default = "active")
     
     customer = relationship('Customer')
     scheme = relationship('Scheme', back_populates = 'policies')
 
+    # ORM updates bump row_version; Core UPDATEs of policy rows must bump it themselves.
+    __mapper_args__ = {"version_id_col": row_version}
+
 class Payment(Base):
     __tablename__ = 'payment'
     payment_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True, index = True)
     customer_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('customer.customer_id'), nullable = False)
-    policy_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("policy.policy_id"), nullable = False)
+    policy_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("policy.policy_id"), nullable = False, index = True)
     amount: Mapped[float] = mapped_column(DECIMAL(10, 2), nullable = False)
-    payment_date: Mapped[date] = mapped_column(Date, nullable = False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
+    payment_date: Mapped[date] = mapped_column(Date, nullable = False, index = True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
+    # Set by the payment gateway; the unique index makes a retried delivery a single lookup.
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(length = 64), nullable = True, unique = True, index = True)
     
     customer = relationship('Customer')
     policy = relationship('Policy')
@@ -124,14 +123,33 @@ class Payment(Base):
 class Commission(Base):
     __tablename__ = 'commission'
     commission_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, index = True, autoincrement = True)
-    agent_id :Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), nullable = False)
-    policy_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('policy.policy_id'), nullable = False)
+    agent_id :Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), nullable = False, index = True)
+    policy_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('policy.policy_id'), nullable = False, index = True)
     commission_amount: Mapped[float] = mapped_column(DECIMAL(10,2), nullable = False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
     
     agent = relationship("Agent", back_populates = 'commission')
     policy = relationship("Policy")
 
+class AgentCommissionTotal(Base):
+    __tablename__ = 'agent_commission_totals'
+    agent_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), primary_key = True)
+    total_commission: Mapped[float] = mapped_column(DECIMAL(14, 2), nullable = False, default = 0)
+    commission_count: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now, onupdate = datetime.now)
+
+class AgentPortfolioMonth(Base):
+    __tablename__ = 'agent_portfolio_month'
+    # Month-by-month changes to an agent's book; running sums give the dashboard totals.
+    agent_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), primary_key = True)
+    month: Mapped[date] = mapped_column(Date, primary_key = True)
+    customers_added: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    policies_issued: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    policies_closed: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    premium_change: Mapped[float] = mapped_column(DECIMAL(16, 2), nullable = False, default = 0)
+    commission: Mapped[float] = mapped_column(DECIMAL(14, 2), nullable = False, default = 0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now, onupdate = datetime.now)
+
 class EmployeeScheme(Base):
     __tablename__ = "employeescheme"
     employeescheme_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True, index = True)
@@ -139,4 +157,63 @@ class EmployeeScheme(Base):
     scheme_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('scheme.scheme_id'), nullable = False)
 
     employee = relationship("Employee")
-    scheme = relationship("Scheme", back_populates="employees")
\ No newline at end of file
+    scheme = relationship("Scheme", back_populates="employees")
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+    outbox_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True, index = True)
+    to_email: Mapped[str] = mapped_column(String(length = 100), nullable = False)
+    subject: Mapped[str] = mapped_column(String(length = 255), nullable = False)
+    body: Mapped[Optional[str]] = mapped_column(Text, nullable = True)
+    status: Mapped[str] = mapped_column(String(length = 20), nullable = False, default = "pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable = False, default = datetime.now)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable = True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable = True)
+
+class Principal(Base):
+    __tablename__ = "principal"
+    __table_args__ = (
+        Index("ix_principal_role_username", "role", "username", unique = True),
+        Index("ix_principal_role_email", "role", "email"),
+    )
+    principal_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True)
+    role: Mapped[str] = mapped_column(String(length = 20), nullable = False)
+    username: Mapped[str] = mapped_column(String(length = 50), nullable = False)
+    email: Mapped[str] = mapped_column(String(length = 100), nullable = False)
+    password: Mapped[str] = mapped_column(String(length = 255), nullable = False)
+    # Exactly one of these points at the row the credentials belong to.
+    admin_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey('admin.admin_id'), nullable = True, unique = True)
+    employee_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey('employee.employee_id'), nullable = True, unique = True)
+    agent_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey('agent.agent_id'), nullable = True, unique = True)
+    customer_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey('customer.customer_id'), nullable = True, unique = True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
+
+    admin = relationship("Admin")
+    employee = relationship("Employee")
+    agent = relationship("Agent")
+    customer = relationship("Customer")
+
+class PremiumRecomputeJob(Base):
+    __tablename__ = "premium_recompute_job"
+    job_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True)
+    # No foreign key: a job is a log entry and must not keep its scheme from being deleted.
+    scheme_id: Mapped[int] = mapped_column(BigInteger, nullable = False, index = True)
+    status: Mapped[str] = mapped_column(String(length = 20), nullable = False, default = "pending")
+    # Policies up to upto_policy_id existed when the job was queued; later ones are priced at issue.
+    last_policy_id: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    upto_policy_id: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    processed: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable = True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default = datetime.now, onupdate = datetime.now)
+
+class PolicyStatusHistory(Base):
+    __tablename__ = "policy_status_history"
+    history_id: Mapped[int] = mapped_column(BigInteger, primary_key = True, autoincrement = True)
+    policy_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('policy.policy_id'), nullable = False, index = True)
+    from_status: Mapped[str] = mapped_column(String(length = 20), nullable = False)
+    to_status: Mapped[str] = mapped_column(String(length = 20), nullable = False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable = False, default = datetime.now)
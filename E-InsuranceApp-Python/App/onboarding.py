@@ -0,0 +1,56 @@
+from typing import Iterable, List, Set, Tuple
+from sqlalchemy import select
+from App.models import Agent, Customer
+from App.schemas import CustomerRegistrationSchema
+from App.utils import EmailUtils, UserRole
+from App.auth import AuthService
+
+def existing_usernames_query(customers: List[CustomerRegistrationSchema]):
+    return select(Customer.username).filter(Customer.username.in_({customer.username for customer in customers}))
+
+def known_agents_query(customers: List[CustomerRegistrationSchema]):
+    return select(Agent.agent_id).filter(Agent.agent_id.in_({customer.agent_id for customer in customers}))
+
+def split_bulk_customers(customers: List[CustomerRegistrationSchema], existing_usernames: Set[str], agent_ids: Set[int]) -> Tuple[list, list]:
+    """Separate the rows that can be inserted from those that cannot, keeping each row's request index."""
+    accepted, errors, seen = [], [], set()
+    for index, customer in enumerate(customers):
+        if customer.username in existing_usernames:
+            detail = "Username already registered"
+        elif customer.username in seen:
+            detail = "Username repeated in this request"
+        elif customer.agent_id not in agent_ids:
+            detail = "Agent Not Exist"
+        else:
+            seen.add(customer.username)
+            accepted.append((index, customer))
+            continue
+        errors.append({"index": index, "username": customer.username, "detail": detail})
+    return accepted, errors
+
+def add_bulk_customers(db, accepted: Iterable[Tuple[int, CustomerRegistrationSchema]], hashed_passwords: Iterable[str]) -> List[Tuple[int, Customer]]:
+    """Stage customers, their principals and welcome emails; everything is written on the caller's flush."""
+    staged = []
+    for (index, customer), hashed_password in zip(accepted, hashed_passwords):
+        new_customer = Customer(
+            username = customer.username,
+            password = hashed_password,
+            fullname = customer.fullname,
+            email = customer.email,
+            phone_number = customer.phone_number,
+            date_of_birth = customer.date_of_birth,
+            agent_id = customer.agent_id
+        )
+        db.add(new_customer)
+        db.add(AuthService.new_principal(UserRole.customer, new_customer))
+        EmailUtils.queue_email(db, new_customer.email,Subject="Credential Details for E-Insuarance App",
+                              body=f"""Welcome to the Application... \n Dear {new_customer.fullname}, \n 
+                              We are pleased to inform you that your e-Insurance account has been successfully created. 
+                              Below you will find your login credentials and instructions for accessing your account. 
+                              \n User Name: {new_customer.username} \n Password: {customer.password}""")
+        staged.append((index, new_customer))
+    return staged
+
+def created_rows(staged: List[Tuple[int, Customer]]) -> List[dict]:
+    # Read the generated keys right after the flush, before commit expires the instances.
+    return [{"index": index, "customer_id": customer.customer_id, "username": customer.username} for index, customer in staged]
@@ -0,0 +1,125 @@
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from App.database import SessionLocal
+from App.models import EmailOutbox
+from App.utils import EmailUtils
+from Core.settings import settings
+from Core import loggers
+
+logger = loggers.get_logger(__name__)
+
+class OutboxWorker:
+    """Drains the email outbox in batches over a single reused SMTP session."""
+
+    def __init__(self, batch_size: int = settings.OUTBOX_BATCH_SIZE, poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+                 max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS, backoff_seconds: float = settings.OUTBOX_BACKOFF_SECONDS):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.server = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _get_server(self) -> smtplib.SMTP:
+        if self.server is not None:
+            try:
+                self.server.noop()
+                return self.server
+            except (smtplib.SMTPException, OSError):
+                self.server = None
+        self.server = EmailUtils.connect_smtp()
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+    def _send(self, row: EmailOutbox):
+        msg = EmailUtils.build_message(row.to_email, Subject=row.subject, body=row.body)
+        try:
+            self._get_server().sendmail(settings.EMAIL, row.to_email, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            self.server = None
+            self._get_server().sendmail(settings.EMAIL, row.to_email, msg.as_string())
+
+    def _mark_failed(self, row: EmailOutbox, error: Exception):
+        row.attempts += 1
+        row.last_error = str(error)
+        if row.attempts >= self.max_attempts:
+            row.status = "failed"
+            # Welcome bodies carry credentials; a row that will never be sent must not keep them.
+            row.body = None
+            logger.error(f"Giving up on outbox email {row.outbox_id} after {row.attempts} attempts: {error}")
+        else:
+            row.next_attempt_at = datetime.now() + timedelta(seconds=self.backoff_seconds * 2 ** (row.attempts - 1))
+            logger.warning(f"Outbox email {row.outbox_id} failed, retry {row.attempts}: {error}")
+
+    def run_once(self) -> int:
+        """Send one batch of due emails and return how many rows were processed."""
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(EmailOutbox)
+                .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= datetime.now())
+                .order_by(EmailOutbox.outbox_id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not rows:
+                return 0
+            try:
+                self._get_server()
+            except (smtplib.SMTPException, OSError) as e:
+                # Server unreachable: leave the batch pending without spending retry attempts.
+                logger.warning(f"SMTP server unavailable, outbox batch deferred: {e}")
+                db.rollback()
+                return 0
+            for row in rows:
+                try:
+                    self._send(row)
+                except (smtplib.SMTPException, OSError) as e:
+                    self._mark_failed(row, e)
+                    continue
+                row.status = "sent"
+                row.sent_at = datetime.now()
+                # The welcome body carries credentials, so do not keep it around once delivered.
+                row.body = None
+            db.commit()
+            return len(rows)
+
+    def run_forever(self):
+        logger.info("Email outbox worker started")
+        while not self.stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                processed = 0
+            if processed < self.batch_size:
+                # Drained for now; release the SMTP session rather than holding it idle.
+                self.close()
+                self.stop_event.wait(self.poll_interval)
+        self.close()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run_forever, name="email-outbox", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+outbox_worker = OutboxWorker()
+
+if __name__ == "__main__":
+    outbox_worker.run_forever()
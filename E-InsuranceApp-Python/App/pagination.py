@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException, Query, status
+from Core.settings import settings
+
+def encode_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": value}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+class PageParams:
+    """Keyset pagination parameters shared by the list endpoints.
+
+    Rows are ordered by a unique, indexed key column (the primary key) and each
+    page resumes strictly after the last key of the previous one, so the cost of
+    a page does not grow with how deep the client has paged.
+    """
+
+    def __init__(self, limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT), cursor: Optional[str] = Query(None)):
+        self.limit = limit
+        self.after = decode_cursor(cursor) if cursor else None
+
+    def apply(self, query, key_column):
+        """Restrict a Query or Select to this page; one extra row is fetched to detect a next page."""
+        if self.after is not None:
+            query = query.filter(key_column > self.after)
+        return query.order_by(key_column).limit(self.limit + 1)
+
+    def slice(self, rows, key_column):
+        """The same page as apply(), taken from rows already sorted by key_column."""
+        if self.after is not None:
+            rows = [row for row in rows if getattr(row, key_column.key) > self.after]
+        return rows[:self.limit + 1]
+
+    def split(self, rows, key_column):
+        """Return the rows of this page and the cursor for the next one (None on the last page)."""
+        rows = list(rows)
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        return rows, encode_cursor(getattr(rows[-1], key_column.key))
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import select
+from App.models import Payment, Policy
+from App.database import insert_returning_ids, insert_returning_ids_async
+from App.schemas import PaymentSchema
+from App.pricing import to_cents
+
+PAYMENT_ERROR_STATUS = {
+    "Idempotency key already used for a different payment": status.HTTP_409_CONFLICT,
+    "Policy not found": status.HTTP_404_NOT_FOUND,
+    "Policy does not belong to the customer": status.HTTP_400_BAD_REQUEST,
+}
+KEY_IN_FLIGHT = "A payment with this idempotency key is being recorded concurrently, retry the request"
+
+def payment_result(payment: PaymentSchema, rows: list, errors: list, response: Response) -> dict:
+    if errors:
+        raise HTTPException(status_code=PAYMENT_ERROR_STATUS[errors[0]["detail"]], detail=errors[0]["detail"])
+    if rows[0]["duplicate"]:
+        response.status_code = status.HTTP_200_OK
+        return {"message": "Payment already recorded", "status": 200, "data": {**payment.model_dump(), "payment_id": rows[0]["payment_id"]}}
+    return {"message": "Payment recorded successfully", "status": 201, "data": {**payment.model_dump(), "payment_id": rows[0]["payment_id"]}}
+
+def existing_payments_query(payments: List[PaymentSchema]):
+    return select(Payment.idempotency_key, Payment.payment_id, Payment.customer_id, Payment.policy_id, Payment.amount) \
+        .filter(Payment.idempotency_key.in_({payment.idempotency_key for payment in payments}))
+
+def policy_owners_query(payments: List[PaymentSchema]):
+    return select(Policy.policy_id, Policy.customer_id).filter(Policy.policy_id.in_({payment.policy_id for payment in payments}))
+
+def _same_payment(recorded, payment: PaymentSchema) -> bool:
+    return (recorded.customer_id, recorded.policy_id, to_cents(recorded.amount)) == (payment.customer_id, payment.policy_id, to_cents(payment.amount))
+
+def split_payments(payments: List[PaymentSchema], existing: Dict[str, tuple], policy_owners: Dict[int, int]) -> Tuple[list, list, list]:
+    """Sort the batch into new payments, replays of recorded ones and rejects, keeping each row's request index."""
+    accepted, replayed, errors, seen = [], [], [], set()
+    for index, payment in enumerate(payments):
+        recorded = existing.get(payment.idempotency_key)
+        if recorded is not None and _same_payment(recorded, payment):
+            replayed.append({"index": index, "payment_id": recorded.payment_id, "idempotency_key": payment.idempotency_key, "duplicate": True})
+            continue
+        if recorded is not None:
+            detail = "Idempotency key already used for a different payment"
+        elif payment.idempotency_key in seen:
+            detail = "Idempotency key repeated in this request"
+        elif payment.policy_id not in policy_owners:
+            detail = "Policy not found"
+        elif policy_owners[payment.policy_id] != payment.customer_id:
+            detail = "Policy does not belong to the customer"
+        else:
+            seen.add(payment.idempotency_key)
+            accepted.append((index, payment))
+            continue
+        errors.append({"index": index, "idempotency_key": payment.idempotency_key, "detail": detail})
+    return accepted, replayed, errors
+
+def build_payment_rows(accepted: List[Tuple[int, PaymentSchema]]) -> List[dict]:
+    now = datetime.now()
+    return [
+        {"customer_id": payment.customer_id, "policy_id": payment.policy_id, "amount": payment.amount,
+         "payment_date": payment.payment_date, "idempotency_key": payment.idempotency_key, "created_at": now}
+        for _, payment in accepted
+    ]
+
+def created_payments(accepted: List[Tuple[int, PaymentSchema]], payment_ids: List[int]) -> List[dict]:
+    return [
+        {"index": index, "payment_id": payment_id, "idempotency_key": payment.idempotency_key, "duplicate": False}
+        for (index, payment), payment_id in zip(accepted, payment_ids)
+    ]
+
+def ingest_payments(db, payments: List[PaymentSchema]) -> Tuple[list, list]:
+    """Record the batch in one INSERT, in the caller's transaction; returns (created and replayed rows, errors)."""
+    existing = {row.idempotency_key: row for row in db.execute(existing_payments_query(payments))}
+    policy_owners = dict(db.execute(policy_owners_query(payments)).all())
+    accepted, replayed, errors = split_payments(payments, existing, policy_owners)
+    payment_ids = insert_returning_ids(db, Payment, Payment.payment_id, build_payment_rows(accepted)) if accepted else []
+    return sorted(created_payments(accepted, payment_ids) + replayed, key=lambda row: row["index"]), errors
+
+async def ingest_payments_async(db, payments: List[PaymentSchema]) -> Tuple[list, list]:
+    existing = {row.idempotency_key: row for row in await db.execute(existing_payments_query(payments))}
+    policy_owners = dict((await db.execute(policy_owners_query(payments))).all())
+    accepted, replayed, errors = split_payments(payments, existing, policy_owners)
+    payment_ids = await insert_returning_ids_async(db, Payment, Payment.payment_id, build_payment_rows(accepted)) if accepted else []
+    return sorted(created_payments(accepted, payment_ids) + replayed, key=lambda row: row["index"]), errors
@@ -0,0 +1,184 @@
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List
+from sqlalchemy import delete, func, insert, select, update
+from App.database import engine, SessionLocal
+from App.models import AgentPortfolioMonth, Commission, Customer, Policy, PolicyStatusHistory
+from App.commission_totals import UPSERT_DIALECTS
+
+ROLLUP_COLUMNS = ("customers_added", "policies_issued", "policies_closed", "premium_change", "commission")
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+def build_portfolio_increment(agent_id: int, month: date, deltas: dict):
+    """Build a single-statement upsert adding `deltas` to one (agent, month) rollup; None without a native upsert."""
+    insert_upsert = UPSERT_DIALECTS.get(engine.dialect.name)
+    if insert_upsert is None:
+        return None
+    now = datetime.now()
+    stmt = insert_upsert(AgentPortfolioMonth).values(agent_id=agent_id, month=month, updated_at=now, **deltas)
+    increments = {name: getattr(AgentPortfolioMonth, name) + value for name, value in deltas.items()}
+    increments["updated_at"] = now
+    if engine.dialect.name in ("mysql", "mariadb"):
+        return stmt.on_duplicate_key_update(**increments)
+    return stmt.on_conflict_do_update(index_elements=[AgentPortfolioMonth.agent_id, AgentPortfolioMonth.month], set_=increments)
+
+def _build_fallback_update(agent_id: int, month: date, deltas: dict):
+    return (
+        update(AgentPortfolioMonth)
+        .where(AgentPortfolioMonth.agent_id == agent_id, AgentPortfolioMonth.month == month)
+        .values(updated_at=datetime.now(), **{name: getattr(AgentPortfolioMonth, name) + value for name, value in deltas.items()})
+    )
+
+def increment_agent_portfolio(db, agent_id: int, on: date = None, **deltas):
+    """Add `deltas` to the agent's rollup for the month of `on` (today by default), inside the caller's transaction."""
+    month = month_of(on or date.today())
+    stmt = build_portfolio_increment(agent_id, month, deltas)
+    if stmt is not None:
+        db.execute(stmt)
+    elif db.execute(_build_fallback_update(agent_id, month, deltas)).rowcount == 0:
+        db.add(AgentPortfolioMonth(agent_id=agent_id, month=month, **deltas))
+
+async def increment_agent_portfolio_async(db, agent_id: int, on: date = None, **deltas):
+    month = month_of(on or date.today())
+    stmt = build_portfolio_increment(agent_id, month, deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+    elif (await db.execute(_build_fallback_update(agent_id, month, deltas))).rowcount == 0:
+        db.add(AgentPortfolioMonth(agent_id=agent_id, month=month, **deltas))
+
+def increment_agent_portfolios(db, deltas_by_agent: Dict[int, dict], on: date = None):
+    """One upsert per agent for changes that span several agents, e.g. a batch of customers or a chunk of policies."""
+    for agent_id, deltas in deltas_by_agent.items():
+        increment_agent_portfolio(db, agent_id, on, **deltas)
+
+async def increment_agent_portfolios_async(db, deltas_by_agent: Dict[int, dict], on: date = None):
+    for agent_id, deltas in deltas_by_agent.items():
+        await increment_agent_portfolio_async(db, agent_id, on, **deltas)
+
+def customers_by_agent(agent_ids: List[int]) -> Dict[int, dict]:
+    counts = defaultdict(int)
+    for agent_id in agent_ids:
+        counts[agent_id] += 1
+    return {agent_id: {"customers_added": count} for agent_id, count in counts.items()}
+
+
+def _as_date(value) -> date:
+    # func.date() comes back as a string on SQLite and as a date elsewhere.
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+def _daily_rollups(db) -> Dict[tuple, dict]:
+    rollups = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS, 0))
+    registered = func.date(Customer.created_at)
+    for agent_id, day, count in db.execute(select(Customer.agent_id, registered, func.count()).group_by(Customer.agent_id, registered)):
+        rollups[agent_id, month_of(_as_date(day))]["customers_added"] += count
+    for agent_id, day, count, premium in db.execute(
+        select(Customer.agent_id, Policy.date_issued, func.count(), func.sum(Policy.premium))
+        .join(Customer, Customer.customer_id == Policy.customer_id)
+        .group_by(Customer.agent_id, Policy.date_issued)
+    ):
+        rollups[agent_id, month_of(_as_date(day))]["policies_issued"] += count
+        rollups[agent_id, month_of(_as_date(day))]["premium_change"] += premium or 0
+    closed = func.date(PolicyStatusHistory.changed_at)
+    for agent_id, day, count, premium in db.execute(
+        select(Customer.agent_id, closed, func.count(), func.sum(Policy.premium))
+        .join(Policy, Policy.policy_id == PolicyStatusHistory.policy_id)
+        .join(Customer, Customer.customer_id == Policy.customer_id)
+        .where(PolicyStatusHistory.from_status == "active")
+        .group_by(Customer.agent_id, closed)
+    ):
+        rollups[agent_id, month_of(_as_date(day))]["policies_closed"] += count
+        rollups[agent_id, month_of(_as_date(day))]["premium_change"] -= premium or 0
+    earned = func.date(Commission.created_at)
+    for agent_id, day, amount in db.execute(
+        select(Commission.agent_id, earned, func.sum(Commission.commission_amount)).group_by(Commission.agent_id, earned)
+    ):
+        rollups[agent_id, month_of(_as_date(day))]["commission"] += amount or 0
+    return rollups
+
+def _customer_book_queries(customer_id: int):
+    closed_day = func.date(PolicyStatusHistory.changed_at)
+    issued = select(Policy.date_issued, func.count(), func.sum(Policy.premium)).where(Policy.customer_id == customer_id).group_by(Policy.date_issued)
+    closed = (
+        select(closed_day, func.count(), func.sum(Policy.premium))
+        .join(Policy, Policy.policy_id == PolicyStatusHistory.policy_id)
+        .where(Policy.customer_id == customer_id, PolicyStatusHistory.from_status == "active")
+        .group_by(closed_day)
+    )
+    return issued, closed
+
+def _customer_book(customer: Customer, issued, closed) -> Dict[date, dict]:
+    # The customer's share of _daily_rollups, by month; commissions stay with the agent that earned them.
+    book = defaultdict(lambda: dict.fromkeys(("customers_added", "policies_issued", "policies_closed", "premium_change"), 0))
+    book[month_of(customer.created_at.date())]["customers_added"] += 1
+    for day, count, premium in issued:
+        book[month_of(_as_date(day))]["policies_issued"] += count
+        book[month_of(_as_date(day))]["premium_change"] += premium or 0
+    for day, count, premium in closed:
+        book[month_of(_as_date(day))]["policies_closed"] += count
+        book[month_of(_as_date(day))]["premium_change"] -= premium or 0
+    return book
+
+def _book_moves(book: Dict[date, dict], old_agent_id: int, new_agent_id: int):
+    for month, deltas in book.items():
+        yield old_agent_id, month, {name: -value for name, value in deltas.items()}
+        yield new_agent_id, month, deltas
+
+def move_customer_portfolio(db, customer: Customer, old_agent_id: int):
+    """Move the customer's registration and policies from old_agent_id's rollups to customer.agent_id's, as rebuild_agent_portfolios would attribute them."""
+    issued, closed = _customer_book_queries(customer.customer_id)
+    book = _customer_book(customer, db.execute(issued).all(), db.execute(closed).all())
+    for agent_id, month, deltas in _book_moves(book, old_agent_id, customer.agent_id):
+        increment_agent_portfolio(db, agent_id, month, **deltas)
+
+async def move_customer_portfolio_async(db, customer: Customer, old_agent_id: int):
+    issued, closed = _customer_book_queries(customer.customer_id)
+    book = _customer_book(customer, (await db.execute(issued)).all(), (await db.execute(closed)).all())
+    for agent_id, month, deltas in _book_moves(book, old_agent_id, customer.agent_id):
+        await increment_agent_portfolio_async(db, agent_id, month, **deltas)
+
+def rebuild_agent_portfolios(db) -> int:
+    """Recompute every rollup from the source tables inside the caller's transaction; returns the row count.
+
+    The aggregation is grouped by day in SQL and folded into months here, which keeps
+    it portable. Premiums are restated at their current values, so re-pricing deltas
+    that were booked in the month they happened move back to the issue month.
+    """
+    now = datetime.now()
+    rows = [{"agent_id": agent_id, "month": month, "updated_at": now, **values} for (agent_id, month), values in _daily_rollups(db).items()]
+    db.execute(delete(AgentPortfolioMonth))
+    if rows:
+        db.execute(insert(AgentPortfolioMonth), rows)
+    return len(rows)
+
+def portfolio_months(rollups: List[AgentPortfolioMonth]) -> List[dict]:
+    """Running totals per month from an agent's rollups, oldest first."""
+    customers = active_policies = premium = 0
+    months = []
+    for rollup in rollups:
+        customers += rollup.customers_added
+        active_policies += rollup.policies_issued - rollup.policies_closed
+        premium += rollup.premium_change
+        months.append({
+            "month": rollup.month, "customers_added": rollup.customers_added, "customers": customers,
+            "policies_issued": rollup.policies_issued, "policies_closed": rollup.policies_closed, "active_policies": active_policies,
+            "premium_under_management": premium, "commission": rollup.commission,
+        })
+    return months
+
+def portfolio_query(agent_id: int):
+    return select(AgentPortfolioMonth).filter(AgentPortfolioMonth.agent_id == agent_id).order_by(AgentPortfolioMonth.month)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the agent portfolio rollups from customers, policies and commissions.")
+    parser.parse_args()
+    with SessionLocal() as db:
+        rows = rebuild_agent_portfolios(db)
+        db.commit()
+    print(f"{rows} agent portfolio months rebuilt")
+
+if __name__ == "__main__":
+    main()
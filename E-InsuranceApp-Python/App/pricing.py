@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from Core.settings import settings
+
+CENT = Decimal("0.01")
+BASIS_POINTS = 10000
+
+def to_cents(amount) -> int:
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+def from_cents(cents) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+def _div_half_up(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    # Exact integer form of Decimal.quantize(ROUND_HALF_UP) for a non-negative numerator over a positive denominator.
+    return (2 * numerator + denominator) // (2 * denominator)
+
+def ages_on(dates_of_birth: Sequence[date], on: date) -> np.ndarray:
+    """Age in completed years on `on` for every date of birth."""
+    births = np.asarray(dates_of_birth, dtype="datetime64[D]")
+    months = births.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    month_day = (months.astype(np.int64) % 12 + 1) * 100 + (births - months).astype(np.int64) + 1
+    return on.year - years - (month_day > on.month * 100 + on.day)
+
+def age_loadings(ages: np.ndarray) -> np.ndarray:
+    """Loading in basis points from settings.PREMIUM_AGE_LOADINGS, a {minimum age: basis points} table."""
+    if not settings.PREMIUM_AGE_LOADINGS:
+        return np.zeros(len(ages), dtype=np.int64)
+    bands = sorted(settings.PREMIUM_AGE_LOADINGS.items())
+    min_ages = np.array([min_age for min_age, _ in bands], dtype=np.int64)
+    loadings = np.array([loading for _, loading in bands], dtype=np.int64)
+    band = np.searchsorted(min_ages, ages, side="right") - 1
+    return np.where(band >= 0, loadings[np.maximum(band, 0)], 0)
+
+def premium_cents(amount_cents: np.ndarray, tenures: np.ndarray, loadings: np.ndarray) -> np.ndarray:
+    """Annual premium: the scheme amount spread over its tenure in months, times twelve, plus the age loading."""
+    return _div_half_up(amount_cents * 12 * (BASIS_POINTS + loadings), tenures * BASIS_POINTS)
+
+def quote(schemes: Dict[int, object], scheme_ids: List[int], tenures: List[Optional[int]], dates_of_birth: List[date],
+          on: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Price every (scheme, tenure, date of birth) option at once; returns tenures, ages, loadings and premiums in cents.
+
+    A missing tenure falls back to the scheme's own. Money is held as integer cents
+    throughout, so the result matches Decimal arithmetic rounded half up to the cent.
+    """
+    missing = sorted(set(scheme_ids) - schemes.keys())
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Enter correct Scheme id - Schemes not present: {missing}")
+    unique_ids, positions = np.unique(np.asarray(scheme_ids, dtype=np.int64), return_inverse=True)
+    catalog = [schemes[scheme_id] for scheme_id in unique_ids.tolist()]
+    amounts = np.array([to_cents(scheme.scheme_amount) for scheme in catalog], dtype=np.int64)[positions]
+    scheme_tenures = np.array([scheme.scheme_tenure for scheme in catalog], dtype=np.int64)[positions]
+    requested = np.array([tenure or 0 for tenure in tenures], dtype=np.int64)
+    tenures = np.where(requested > 0, requested, scheme_tenures)
+    if (tenures <= 0).any():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Scheme tenure must be positive")
+    ages = ages_on(dates_of_birth, on or date.today())
+    if (ages < 0).any():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Date of birth cannot be in the future")
+    loadings = age_loadings(ages)
+    return tenures, ages, loadings, premium_cents(amounts, tenures, loadings)
+
+def price_policies(schemes: Dict[int, object], scheme_ids: List[int], date_of_birth: date) -> Tuple[List[Decimal], List[int]]:
+    """Premiums and age loadings for policies issued to one customer, each at its scheme's own tenure."""
+    _, _, loadings, premiums = quote(schemes, scheme_ids, [None] * len(scheme_ids), [date_of_birth] * len(scheme_ids))
+    return [from_cents(cents) for cents in premiums.tolist()], loadings.tolist()
+
+def scheme_premiums(scheme, loadings: List[int]) -> List[Decimal]:
+    """The premium of a policy on `scheme` for each age loading, at the scheme's current amount and tenure."""
+    amounts = np.full(len(loadings), to_cents(scheme.scheme_amount), dtype=np.int64)
+    tenures = np.full(len(loadings), scheme.scheme_tenure, dtype=np.int64)
+    return [from_cents(cents) for cents in premium_cents(amounts, tenures, np.asarray(loadings, dtype=np.int64)).tolist()]
+
+def commission_for(premium) -> Decimal:
+    """The agent's commission: a quarter of the premium."""
+    return (Decimal(str(premium)) / 4).quantize(CENT, rounding=ROUND_HALF_UP)
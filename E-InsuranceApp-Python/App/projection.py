@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple, get_args, get_origin
+from fastapi import HTTPException, Query, status
+from pydantic import create_model
+
+# Never selected on a read path, whatever the response schema declares.
+PRIVATE_FIELDS = {"password"}
+
+class FieldSelection:
+    """`fields=` query parameter: the comma separated subset of a row's fields to return.
+
+    Used as a dependency, `Depends(FieldSelection(RowSchema, Model))` resolves to the
+    validated tuple of field names, defaulting to every public field of the schema.
+    columns() turns those names into the column-level select for the query.
+    """
+
+    def __init__(self, schema, model):
+        self.model = model
+        self.allowed = tuple(name for name in schema.model_fields if name not in PRIVATE_FIELDS)
+
+    def __call__(self, fields: Optional[str] = Query(None, description="Comma separated fields to return, all by default")) -> Tuple[str, ...]:
+        if fields is None:
+            return self.allowed
+        names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in self.allowed]
+        if unknown or not names:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Unknown fields: {', '.join(unknown) or fields}; choose from {', '.join(self.allowed)}")
+        return names
+
+    def columns(self, names: Tuple[str, ...], *extra):
+        """Columns for `names`, plus any `extra` columns the handler needs (keyset key, row version)."""
+        columns = [getattr(self.model, name) for name in names]
+        return columns + [column for column in extra if column.key not in names]
+
+@lru_cache(maxsize=None)
+def project_schema(response_schema, names: Tuple[str, ...]):
+    """`response_schema` with its `data` rows narrowed to `names`, for json_response."""
+    annotation = response_schema.model_fields["data"].annotation
+    many = get_origin(annotation) in (list, List)
+    row_schema = get_args(annotation)[0] if many else annotation
+    row = create_model(f"{row_schema.__name__}Fields", **{name: (row_schema.model_fields[name].annotation, row_schema.model_fields[name]) for name in names})
+    return create_model(response_schema.__name__, __base__=response_schema, data=(List[row] if many else row, ...))
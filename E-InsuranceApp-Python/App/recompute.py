@@ -0,0 +1,178 @@
+import argparse
+import threading
+from datetime import datetime
+from sqlalchemy import case, func, select, update
+from App.database import SessionLocal
+from App.models import Commission, Customer, Policy, PremiumRecomputeJob, Scheme
+from App.pricing import scheme_premiums, commission_for
+from App.commission_totals import increment_agent_commission_total
+from App.portfolio import increment_agent_portfolios
+from Core.settings import settings
+from Core import loggers
+
+logger = loggers.get_logger(__name__)
+
+def _queue_job(scheme_id: int, upto_policy_id) -> PremiumRecomputeJob:
+    return PremiumRecomputeJob(scheme_id=scheme_id, status="pending", last_policy_id=0, upto_policy_id=upto_policy_id or 0, processed=0)
+
+def _last_policy_query(scheme_id: int):
+    return select(func.max(Policy.policy_id)).where(Policy.scheme_id == scheme_id)
+
+def enqueue_recompute(db, scheme_id: int) -> PremiumRecomputeJob:
+    """Queue a re-pricing of every policy the scheme has now, in the caller's transaction."""
+    job = _queue_job(scheme_id, db.execute(_last_policy_query(scheme_id)).scalar())
+    db.add(job)
+    db.flush()
+    return job
+
+async def enqueue_recompute_async(db, scheme_id: int) -> PremiumRecomputeJob:
+    job = _queue_job(scheme_id, (await db.execute(_last_policy_query(scheme_id))).scalar())
+    db.add(job)
+    await db.flush()
+    return job
+
+
+class PremiumRecompute:
+    """Re-prices a scheme's policies and their commissions after its amount or tenure changes.
+
+    Only active policies are re-priced. They are walked in policy_id order, one chunk
+    per transaction. Each chunk is a couple of set-based UPDATEs, and the job row
+    records how far it got in that same transaction, so an interrupted job resumes
+    after its last committed chunk.
+    Prices are read from the scheme at every chunk, so re-running a job, or two
+    jobs overlapping on one scheme, converge on the scheme's current terms.
+    """
+
+    def __init__(self, chunk_size: int = settings.RECOMPUTE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def _chunk_end(self, db, job: PremiumRecomputeJob) -> int:
+        end = db.execute(
+            select(Policy.policy_id)
+            .where(Policy.scheme_id == job.scheme_id, Policy.status == "active", Policy.policy_id > job.last_policy_id, Policy.policy_id <= job.upto_policy_id)
+            .order_by(Policy.policy_id)
+            .offset(self.chunk_size - 1)
+            .limit(1)
+        ).scalar()
+        return end if end is not None else job.upto_policy_id
+
+    def _agent_commissions(self, db, in_chunk) -> dict:
+        rows = db.execute(
+            select(Commission.agent_id, func.sum(Commission.commission_amount))
+            .where(Commission.policy_id == Policy.policy_id, *in_chunk)
+            .group_by(Commission.agent_id)
+        )
+        return {agent_id: total for agent_id, total in rows}
+
+    def _agent_premiums(self, db, in_chunk) -> dict:
+        rows = db.execute(
+            select(Customer.agent_id, func.sum(Policy.premium))
+            .join(Customer, Customer.customer_id == Policy.customer_id)
+            .where(*in_chunk)
+            .group_by(Customer.agent_id)
+        )
+        return {agent_id: total for agent_id, total in rows}
+
+    def run_chunk(self, db, job: PremiumRecomputeJob) -> int:
+        """Re-price the next chunk of the job and advance it; the caller commits."""
+        scheme = db.get(Scheme, job.scheme_id)
+        if scheme is None:
+            raise ValueError(f"Scheme {job.scheme_id} no longer exists")
+        end = self._chunk_end(db, job)
+        # Matured and lapsed policies keep the premium and commission they were settled on.
+        in_chunk = (Policy.scheme_id == job.scheme_id, Policy.status == "active", Policy.policy_id > job.last_policy_id, Policy.policy_id <= end)
+        updated = 0
+        # A policy's price depends only on the scheme and its age loading, so a chunk has a handful of distinct prices.
+        loadings = db.execute(select(Policy.age_loading).distinct().where(*in_chunk)).scalars().all()
+        if loadings:
+            premiums = dict(zip(loadings, scheme_premiums(scheme, loadings)))
+            commissions = {loading: commission_for(premium) for loading, premium in premiums.items()}
+            before = self._agent_commissions(db, in_chunk)
+            premiums_before = self._agent_premiums(db, in_chunk)
+            updated = db.execute(
+                update(Policy).where(*in_chunk)
+                .values(premium=case(premiums, value=Policy.age_loading), row_version=Policy.row_version + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.execute(
+                update(Commission).where(Commission.policy_id == Policy.policy_id, *in_chunk)
+                .values(commission_amount=case(commissions, value=Policy.age_loading))
+                .execution_options(synchronize_session=False)
+            )
+            after = self._agent_commissions(db, in_chunk)
+            changes = {}
+            for agent_id, total in after.items():
+                if total != before.get(agent_id):
+                    increment_agent_commission_total(db, agent_id, total - before.get(agent_id, 0), count=0)
+                    changes.setdefault(agent_id, {})["commission"] = total - before.get(agent_id, 0)
+            for agent_id, total in self._agent_premiums(db, in_chunk).items():
+                if total != premiums_before.get(agent_id):
+                    changes.setdefault(agent_id, {})["premium_change"] = total - premiums_before.get(agent_id, 0)
+            # Re-pricing is booked in the month it happens.
+            increment_agent_portfolios(db, changes)
+        job.last_policy_id = end
+        job.processed += updated
+        return updated
+
+    def run(self, job_id: int) -> PremiumRecomputeJob:
+        """Run (or resume) a job to completion, committing after every chunk."""
+        logger.info(f"Premium recompute job {job_id} started")
+        while True:
+            with SessionLocal(expire_on_commit=False) as db:
+                job = db.get(PremiumRecomputeJob, job_id, with_for_update=True)
+                if job is None:
+                    raise ValueError(f"No premium recompute job {job_id}")
+                if job.last_policy_id >= job.upto_policy_id:
+                    job.status = "done"
+                    db.commit()
+                    logger.info(f"Premium recompute job {job_id} done, {job.processed} policies re-priced")
+                    return job
+                job.status = "running"
+                job.error = None
+                try:
+                    self.run_chunk(db, job)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.exception(f"Premium recompute job {job_id} failed at policy {job.last_policy_id}")
+                    self._mark_failed(job_id, e)
+                    raise
+
+    def _mark_failed(self, job_id: int, error: Exception):
+        with SessionLocal() as db:
+            db.execute(update(PremiumRecomputeJob).where(PremiumRecomputeJob.job_id == job_id).values(status="failed", error=str(error), updated_at=datetime.now()))
+            db.commit()
+
+    def _run_quietly(self, job_id: int):
+        try:
+            self.run(job_id)
+        except Exception:
+            pass  # Logged and recorded on the job; it can be resumed from the CLI or the API.
+
+    def start(self, job_id: int) -> threading.Thread:
+        """Run the job on a background thread."""
+        thread = threading.Thread(target=self._run_quietly, args=(job_id,), name=f"premium-recompute-{job_id}", daemon=True)
+        thread.start()
+        return thread
+
+
+premium_recompute = PremiumRecompute()
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-price a scheme's existing policies and commissions.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--scheme-id", type=int, help="queue and run a new job for this scheme")
+    target.add_argument("--job-id", type=int, help="resume an existing job")
+    parser.add_argument("--chunk-size", type=int, default=settings.RECOMPUTE_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    job_id = args.job_id
+    if args.scheme_id is not None:
+        with SessionLocal() as db:
+            job_id = enqueue_recompute(db, args.scheme_id).job_id
+            db.commit()
+    job = PremiumRecompute(chunk_size=args.chunk_size).run(job_id)
+    print(f"job {job.job_id}: {job.status}, {job.processed} policies re-priced")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from decimal import InvalidOperation
+from typing import Iterable, Iterator, Optional, Tuple
+from sqlalchemy import select
+from App.database import SessionLocal
+from App.models import Payment
+from App.pricing import to_cents, from_cents
+from Core.settings import settings
+
+STATEMENT_COLUMNS = ("policy_id", "amount", "payment_date")
+REPORTS = ("matched", "unmatched", "duplicate")
+REPORT_COLUMNS = ["statement_line", "payment_id", "policy_id", "amount", "payment_date"]
+
+
+class Reconciliation:
+    """Matches bank statement lines to Payment rows on (policy_id, amount, payment_date).
+
+    A grace hash join: both sides are streamed once into `partitions` temporary
+    files by the hash of their key, then joined one partition at a time, so only
+    a single partition of statement keys is ever held in memory.
+
+    Within a key, statement lines and payments are paired one to one. The pairs
+    are "matched"; surplus lines or payments of a key that did pair are
+    "duplicate"; keys found on one side only are "unmatched". Statement lines
+    that cannot be parsed are reported as unmatched with their raw values.
+    """
+
+    def __init__(self, partitions: int = settings.RECONCILE_PARTITIONS, batch_size: int = settings.RECONCILE_BATCH_SIZE):
+        self.partitions = partitions
+        self.batch_size = batch_size
+        # Removed by close(), or by the finalizer if the caller never gets that far (e.g. a client disconnecting mid-stream).
+        self.tempdir = tempfile.TemporaryDirectory(prefix="reconcile-", ignore_cleanup_errors=True)
+        self.workdir = self.tempdir.name
+        self.date_from = None
+        self.date_to = None
+        self.counts = {"statement_lines": 0, "payments": 0, **{report: 0 for report in REPORTS}}
+
+    def _path(self, side: str, partition) -> str:
+        return os.path.join(self.workdir, f"{side}-{partition}.csv")
+
+    def _partition(self, side: str, keyed_rows: Iterable[Tuple[int, tuple]]):
+        files = [open(self._path(side, partition), "w", newline="") for partition in range(self.partitions)]
+        try:
+            writers = [csv.writer(file) for file in files]
+            for row_id, key in keyed_rows:
+                writers[hash(key) % self.partitions].writerow((row_id, *key))
+        finally:
+            for file in files:
+                file.close()
+
+    def _statement_keys(self, reader, malformed):
+        for line, row in enumerate(reader, start=2):
+            self.counts["statement_lines"] += 1
+            try:
+                key = (int(row["policy_id"]), to_cents(row["amount"]), date.fromisoformat(row["payment_date"].strip()))
+            except (TypeError, ValueError, AttributeError, InvalidOperation):
+                malformed.writerow((line, "", row.get("policy_id"), row.get("amount"), row.get("payment_date")))
+                continue
+            self.date_from = min(self.date_from or key[2], key[2])
+            self.date_to = max(self.date_to or key[2], key[2])
+            yield line, (key[0], key[1], key[2].isoformat())
+
+    def partition_statement(self, statement: io.TextIOBase):
+        """Stream a CSV statement with policy_id, amount and payment_date columns into partitions."""
+        reader = csv.DictReader(statement)
+        missing = [column for column in STATEMENT_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Statement is missing columns: {', '.join(missing)}")
+        with open(self._path("statement", "malformed"), "w", newline="") as file:
+            self._partition("statement", self._statement_keys(reader, csv.writer(file)))
+
+    def partition_payments(self, db, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """Stream the payments dated within the statement's period (or the given one) into partitions."""
+        date_from, date_to = date_from or self.date_from, date_to or self.date_to
+        if date_from is None or date_to is None:
+            raise ValueError("No payment period: the statement has no valid lines and no dates were given")
+        result = db.execute(
+            select(Payment.payment_id, Payment.policy_id, Payment.amount, Payment.payment_date)
+            .filter(Payment.payment_date >= date_from, Payment.payment_date <= date_to)
+            .execution_options(yield_per=self.batch_size)
+        )
+        self._partition("payment", self._payment_keys(result))
+
+    def prepare(self, statement_path: str, date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """Partition the statement file and the payments of its period, ready for join()."""
+        with open(statement_path, newline="", encoding="utf-8-sig") as statement:
+            self.partition_statement(statement)
+        with SessionLocal() as db:
+            self.partition_payments(db, date_from, date_to)
+
+    def _payment_keys(self, result):
+        for payment_id, policy_id, amount, payment_date in result:
+            self.counts["payments"] += 1
+            yield payment_id, (policy_id, to_cents(amount), payment_date.isoformat())
+
+    def _emit(self, report: str, statement_line, payment_id, policy_id, cents, payment_date) -> tuple:
+        self.counts[report] += 1
+        return report, [statement_line, payment_id, policy_id, from_cents(cents), payment_date]
+
+    def _join_partition(self, partition: int) -> Iterator[tuple]:
+        statement = {}
+        with open(self._path("statement", partition), newline="") as file:
+            for line, policy_id, cents, payment_date in csv.reader(file):
+                statement.setdefault((int(policy_id), int(cents), payment_date), []).append(line)
+        paired = set()
+        with open(self._path("payment", partition), newline="") as file:
+            for payment_id, policy_id, cents, payment_date in csv.reader(file):
+                key = (int(policy_id), int(cents), payment_date)
+                lines = statement.get(key)
+                if lines:
+                    paired.add(key)
+                    yield self._emit("matched", lines.pop(0), payment_id, *key)
+                else:
+                    yield self._emit("duplicate" if key in paired else "unmatched", "", payment_id, *key)
+        for key, lines in statement.items():
+            for line in lines:
+                yield self._emit("duplicate" if key in paired else "unmatched", line, "", *key)
+
+    def join(self) -> Iterator[tuple]:
+        """Yield (report, row) for every statement line and payment, one partition at a time."""
+        with open(self._path("statement", "malformed"), newline="") as file:
+            for row in csv.reader(file):
+                self.counts["unmatched"] += 1
+                yield "unmatched", row
+        for partition in range(self.partitions):
+            yield from self._join_partition(partition)
+
+    def close(self):
+        self.tempdir.cleanup()
+
+    def report_stream(self) -> Iterator[str]:
+        """One CSV of every row tagged with its report, for streaming back over HTTP; cleans up when exhausted or closed."""
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["report", *REPORT_COLUMNS])
+            for report, row in self.join():
+                writer.writerow([report, *row])
+                if buffer.tell() >= 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile a bank statement CSV against recorded payments.")
+    parser.add_argument("statement", help="CSV file with policy_id, amount and payment_date columns")
+    parser.add_argument("--out", default=".", help="directory for matched.csv, unmatched.csv and duplicate.csv")
+    parser.add_argument("--date-from", type=date.fromisoformat, default=None, help="first payment date to consider (default: the statement's first)")
+    parser.add_argument("--date-to", type=date.fromisoformat, default=None, help="last payment date to consider (default: the statement's last)")
+    parser.add_argument("--partitions", type=int, default=settings.RECONCILE_PARTITIONS)
+    args = parser.parse_args()
+
+    reconciliation = Reconciliation(partitions=args.partitions)
+    os.makedirs(args.out, exist_ok=True)
+    files = {report: open(os.path.join(args.out, f"{report}.csv"), "w", newline="") for report in REPORTS}
+    try:
+        reconciliation.prepare(args.statement, args.date_from, args.date_to)
+        writers = {report: csv.writer(file) for report, file in files.items()}
+        for writer in writers.values():
+            writer.writerow(REPORT_COLUMNS)
+        for report, row in reconciliation.join():
+            writers[report].writerow(row)
+    finally:
+        for file in files.values():
+            file.close()
+        reconciliation.close()
+    print(", ".join(f"{name}: {count}" for name, count in reconciliation.counts.items()))
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,15 @@ from Core import loggers
 from datetime import date, datetime
 from .utils import UserRole
 
-log_file = "insurance.log"
-logger = loggers.setup_logger(log_file)
+logger = loggers.get_logger(__name__)
 
 class BaseResponseModel(BaseModel):
     message: str
     status: int
 
+class CursorPageSchema(BaseModel):
+    next_cursor: Optional[str] = None
+
 class AdminRegistrationSchema(BaseModel):    
     username: str = Field(default=" ",pattern=r"^[a-zA-Z0-9.]{3,15}$")
     password: str = Field(default=" ",min_length=8,max_length=250,description="Minimun 8 long,1 Caps, 1 Special Character and 1 Num")
@@ -60,7 +62,7 @@ class EmployeeListSchema(BaseModel):
     role: str = Field(...,min_length=1,max_length=100)
     created_at: Optional[datetime] = None
 
-class EmployeeReadSchema(BaseModel):
+class EmployeeReadSchema(CursorPageSchema):
     data: List[EmployeeListSchema]
 
 class CustomerRegistrationSchema(BaseModel):
@@ -117,7 +119,7 @@ class AgentListSchema(BaseModel):
     email: EmailStr = Field(description = "THe Email entered should be valid")
     created_at: Optional[datetime] = Field(datetime.now())
 
-class AgentReadSchema(BaseModel):
+class AgentReadSchema(CursorPageSchema):
     data: List[AgentListSchema]
 
 class LoginSchema(BaseModel):
@@ -134,7 +136,7 @@ class CustomerReadSchema(BaseModel):
     agent_id: int
     created_at: Optional[datetime] = Field(datetime.now())
     
-class CustomersListResponseSchema(BaseModel):
+class CustomersListResponseSchema(CursorPageSchema):
     data: List[CustomerReadSchema]
 
 class InsurancePlanSchema(BaseModel):
@@ -145,7 +147,7 @@ class InsurancePlanSchema(BaseModel):
 class InsurancePlanResponseSchema(BaseResponseModel):
     data: InsurancePlanSchema
 
-class InsuranceReadSchema(BaseModel):
+class InsuranceReadSchema(CursorPageSchema):
     data: List[InsurancePlanSchema]
 
 class SchemeSchema(BaseModel):
@@ -160,9 +162,40 @@ class SchemeSchema(BaseModel):
 class SchemeResponseSchema(BaseResponseModel):
     data: SchemeSchema
 
-class SchemeReadSchema(BaseModel):
+class SchemeReadSchema(CursorPageSchema):
     data: List[SchemeSchema]
 
+class QuoteRequestSchema(BaseModel):
+    scheme_id: int
+    tenure: Optional[int] = Field(default=None, gt=0, description="Tenure in months, the scheme's own tenure when omitted")
+    date_of_birth: date
+
+class QuoteSchema(BaseModel):
+    scheme_id: int
+    tenure: int
+    age: int
+    premium: float
+
+class QuoteResponseSchema(BaseResponseModel):
+    data: List[QuoteSchema]
+
+class PremiumRecomputeJobSchema(BaseModel):
+    job_id: int
+    scheme_id: int
+    status: str
+    processed: int
+    last_policy_id: int
+    upto_policy_id: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PremiumRecomputeJobResponseSchema(BaseResponseModel):
+    data: PremiumRecomputeJobSchema
+
 class PolicySchema(BaseModel):
     scheme_id: int
     policy_details: str = Field(min_length = 3, description = 'Enter the valid description for the given policy')
@@ -175,9 +208,18 @@ class PolicySchema(BaseModel):
 class PolicyResponseSchema(BaseResponseModel):
     data: PolicySchema
 
-class PolicyReadSchema(BaseModel):
+class PolicyReadSchema(CursorPageSchema):
     data: List[PolicySchema]
 
+class IssuedPolicySchema(BaseModel):
+    policy_id: int
+    scheme_id: int
+    premium: float
+    commission_amount: float
+
+class PolicyBatchResponseSchema(BaseResponseModel):
+    data: List[IssuedPolicySchema]
+
 class AgentData(BaseModel):
     agent_id: int
 
@@ -190,10 +232,51 @@ class CommissionSchema(BaseModel):
     class Config:
         from_attributes = True
 
-class CommissionResponseSchema(BaseResponseModel):
+class CommissionResponseSchema(BaseResponseModel, CursorPageSchema):
     data: List[AgentData]
     total_commission: float
 
+class BulkRegisteredCustomerSchema(BaseModel):
+    index: int
+    customer_id: int
+    username: str
+
+class BulkRegistrationErrorSchema(BaseModel):
+    index: int
+    username: str
+    detail: str
+
+class BulkCustomerRegistrationResponseSchema(BaseResponseModel):
+    created: int
+    data: List[BulkRegisteredCustomerSchema]
+    errors: List[BulkRegistrationErrorSchema]
+
+class AgentCommissionTotalSchema(BaseModel):
+    agent_id: int
+    total_commission: float
+    commission_count: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AgentCommissionTotalResponseSchema(BaseResponseModel):
+    data: AgentCommissionTotalSchema
+
+class PortfolioMonthSchema(BaseModel):
+    month: date
+    customers_added: int
+    customers: int
+    policies_issued: int
+    policies_closed: int
+    active_policies: int
+    premium_under_management: float
+    commission: float
+
+class AgentPortfolioResponseSchema(BaseResponseModel):
+    agent_id: int
+    data: List[PortfolioMonthSchema]
+
 class EmployeeSchemeSchema(BaseModel):
     employee_id: int
     scheme_id: int
@@ -203,4 +286,35 @@ class PaymentSchema(BaseModel):
     policy_id: int
     amount: float = Field(gt = 0)
     payment_date: date
-    created_at: Optional[datetime] = Field(datetime.now())
\ No newline at end of file
+    created_at: Optional[datetime] = Field(datetime.now())
+    idempotency_key: str = Field(min_length = 1, max_length = 64, description = "Unique per payment; a retry with the same key is not recorded twice")
+
+class PaymentRecordSchema(BaseModel):
+    payment_id: int
+    customer_id: int
+    policy_id: int
+    amount: float
+    payment_date: date
+    idempotency_key: str
+
+    class Config:
+        from_attributes = True
+
+class PaymentResponseSchema(BaseResponseModel):
+    data: PaymentRecordSchema
+
+class IngestedPaymentSchema(BaseModel):
+    index: int
+    payment_id: int
+    idempotency_key: str
+    duplicate: bool
+
+class PaymentErrorSchema(BaseModel):
+    index: int
+    idempotency_key: str
+    detail: str
+
+class PaymentBatchResponseSchema(BaseResponseModel):
+    created: int
+    data: List[IngestedPaymentSchema]
+    errors: List[PaymentErrorSchema]
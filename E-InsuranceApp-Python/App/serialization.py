@@ -0,0 +1,25 @@
+from functools import lru_cache
+from typing import Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def get_type_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+def json_response(schema, payload: dict, response: Optional[Response] = None, status_code: int = 200) -> JSONBytesResponse:
+    """Validate a trusted payload against `schema` in one pass and send the serialized bytes.
+
+    Rows may be ORM instances or Rows. Returning a Response directly means FastAPI
+    skips its own response_model validation and JSON encoding; headers already set
+    on the injected `response` (such as the ETag) are carried over.
+    """
+    adapter = get_type_adapter(schema)
+    content = adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return JSONBytesResponse(content=content, status_code=status_code, headers=headers)
@@ -0,0 +1,222 @@
+import argparse
+import glob
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import BigInteger, Date, DateTime, Integer, Numeric, or_, select
+from App.database import SessionLocal
+from App.models import Commission, Customer, Payment, Policy, Scheme
+from Core.settings import settings
+from Core import loggers
+
+logger = loggers.get_logger(__name__)
+
+# Scheme is small and edited in place, so it is replaced on every run; the rest are appended by created_at.
+SNAPSHOT_TABLES = {
+    "customer": (Customer, True),
+    "policy": (Policy, True),
+    "scheme": (Scheme, False),
+    "commission": (Commission, True),
+    "payment": (Payment, True),
+}
+EXCLUDED_COLUMNS = {"password"}
+MANIFEST = "manifest.json"
+IN_PROGRESS = ".inprogress"
+
+def arrow_type(column) -> pa.DataType:
+    if isinstance(column.type, (BigInteger, Integer)):
+        return pa.int64()
+    if isinstance(column.type, Numeric):
+        return pa.decimal128(column.type.precision or 18, column.type.scale or 2)
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    return pa.string()
+
+def snapshot_columns(model) -> list:
+    return [column for column in model.__table__.columns if column.key not in EXCLUDED_COLUMNS]
+
+def arrow_schema(model) -> pa.Schema:
+    return pa.schema([(column.key, arrow_type(column)) for column in snapshot_columns(model)])
+
+def created_month(created_at: Optional[datetime]) -> str:
+    return created_at.strftime("%Y-%m") if created_at is not None else "unknown"
+
+
+class SnapshotExporter:
+    """Streams the reporting tables into Parquet files under `root`, partitioned by created month.
+
+    Rows are read with a server-side cursor in batches and each batch is appended to
+    one file per (table, created_month) for the run, so memory stays bounded by the
+    batch size. Each incremental table is exported from its last watermark up to a
+    cutoff a little behind now, leaving room for transactions still in flight. Files
+    are written under a temporary name and only become part of the snapshot when the
+    manifest naming them is replaced, so a failed run leaves the previous snapshot
+    intact and the next run simply exports the same range again. Rows changed after
+    they were exported are not revisited; the snapshot holds them as first exported.
+    """
+
+    def __init__(self, root: str = settings.SNAPSHOT_DIR, batch_size: int = settings.SNAPSHOT_BATCH_SIZE,
+                 lag_seconds: float = settings.SNAPSHOT_LAG_SECONDS):
+        self.root = root
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+
+    def load_manifest(self) -> dict:
+        return load_manifest(self.root)
+
+    def _write_manifest(self, manifest: dict):
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + IN_PROGRESS, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(path + IN_PROGRESS, path)
+
+    def _clean_failed_runs(self):
+        for path in glob.glob(os.path.join(self.root, "**", f"*{IN_PROGRESS}"), recursive=True):
+            os.remove(path)
+
+    def export_table(self, db, name: str, model, watermark: Optional[str], cutoff: datetime, run_id: str) -> List[dict]:
+        """Append the table's rows created after `watermark` and up to `cutoff`; returns the new files' entries."""
+        columns = snapshot_columns(model)
+        schema = arrow_schema(model)
+        if watermark is not None:
+            stmt = select(*columns).filter(model.created_at > datetime.fromisoformat(watermark), model.created_at <= cutoff)
+        else:
+            stmt = select(*columns).filter(or_(model.created_at <= cutoff, model.created_at.is_(None)))
+        writers, counts = {}, defaultdict(int)
+        try:
+            result = db.execute(stmt.execution_options(yield_per=self.batch_size))
+            for batch in result.partitions():
+                months = defaultdict(list)
+                for row in batch:
+                    months[created_month(row.created_at)].append(row)
+                for month, rows in months.items():
+                    if month not in writers:
+                        directory = os.path.join(self.root, name, f"created_month={month}")
+                        os.makedirs(directory, exist_ok=True)
+                        writers[month] = pq.ParquetWriter(os.path.join(directory, f"part-{run_id}.parquet{IN_PROGRESS}"), schema)
+                    writers[month].write_table(pa.Table.from_pylist([row._asdict() for row in rows], schema=schema))
+                    counts[month] += len(rows)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return [{"path": os.path.join(name, f"created_month={month}", f"part-{run_id}.parquet"), "rows": counts[month]} for month in sorted(writers)]
+
+    def run(self, tables: Optional[List[str]] = None) -> dict:
+        """Export every table (or the given ones) and publish the new manifest."""
+        os.makedirs(self.root, exist_ok=True)
+        self._clean_failed_runs()
+        manifest = self.load_manifest()
+        run_id = datetime.now().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        cutoff = datetime.now() - timedelta(seconds=self.lag_seconds)
+        published, replaced = {}, []
+        with SessionLocal() as db:
+            for name in tables or SNAPSHOT_TABLES:
+                model, incremental = SNAPSHOT_TABLES[name]
+                entry = manifest["tables"].get(name, {"files": [], "rows": 0, "watermark": None})
+                watermark = entry["watermark"] if incremental else None
+                files = self.export_table(db, name, model, watermark, cutoff, run_id)
+                if not incremental:
+                    replaced += entry["files"]
+                    entry = {"files": [], "rows": 0, "watermark": None}
+                entry = {
+                    "files": entry["files"] + files,
+                    "rows": entry["rows"] + sum(file["rows"] for file in files),
+                    "watermark": cutoff.isoformat(),
+                }
+                published[name] = entry
+                logger.info(f"Snapshot {run_id}: {sum(file['rows'] for file in files)} {name} rows exported")
+        for entry in published.values():
+            for file in entry["files"]:
+                path = os.path.join(self.root, file["path"])
+                if os.path.exists(path + IN_PROGRESS):
+                    os.replace(path + IN_PROGRESS, path)
+        manifest = {"run_id": run_id, "exported_at": datetime.now().isoformat(), "tables": {**manifest["tables"], **published}}
+        self._write_manifest(manifest)
+        for file in replaced:
+            path = os.path.join(self.root, file["path"])
+            if os.path.exists(path):
+                os.remove(path)
+        return manifest
+
+
+def load_manifest(root: str) -> dict:
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {"run_id": None, "exported_at": None, "tables": {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+class Snapshot:
+    """Answers reporting questions from an exported snapshot with Arrow compute, leaving the live database alone.
+
+    Only the files named in the manifest are read, so a run in progress is never seen.
+    """
+
+    def __init__(self, root: str = settings.SNAPSHOT_DIR):
+        self.root = root
+        self.manifest = load_manifest(root)
+
+    def dataset(self, name: str) -> ds.Dataset:
+        model, _ = SNAPSHOT_TABLES[name]
+        files = [os.path.join(self.root, file["path"]) for file in self.manifest["tables"].get(name, {}).get("files", [])]
+        partitioning = ds.partitioning(pa.schema([("created_month", pa.string())]), flavor="hive")
+        return ds.dataset(files, schema=arrow_schema(model).append(pa.field("created_month", pa.string())),
+                          format="parquet", partitioning=partitioning, partition_base_dir=os.path.join(self.root, name))
+
+    def table(self, name: str, columns: Optional[List[str]] = None, filter=None) -> pa.Table:
+        return self.dataset(name).to_table(columns=columns, filter=filter)
+
+    def premium_by_scheme(self) -> pa.Table:
+        """Policies and premium written per scheme, with the scheme's name."""
+        policies = self.table("policy", ["scheme_id", "premium"]).group_by("scheme_id").aggregate([("premium", "count"), ("premium", "sum")])
+        schemes = self.table("scheme", ["scheme_id", "scheme_name"])
+        return policies.join(schemes, "scheme_id").rename_columns(["scheme_id", "policies", "premium", "scheme_name"]).sort_by("scheme_id")
+
+    def commission_by_agent_month(self, agent_id: Optional[int] = None) -> pa.Table:
+        filter = pc.field("agent_id") == agent_id if agent_id is not None else None
+        commissions = self.table("commission", ["agent_id", "created_month", "commission_amount"], filter)
+        return commissions.group_by(["agent_id", "created_month"]).aggregate([("commission_amount", "sum")]) \
+            .rename_columns(["agent_id", "created_month", "commission"]).sort_by([("agent_id", "ascending"), ("created_month", "ascending")])
+
+    def payments_by_month(self) -> pa.Table:
+        payments = self.table("payment", ["created_month", "amount"])
+        return payments.group_by("created_month").aggregate([("amount", "count"), ("amount", "sum")]) \
+            .rename_columns(["created_month", "payments", "amount"]).sort_by("created_month")
+
+REPORTS = {
+    "premium-by-scheme": Snapshot.premium_by_scheme,
+    "commission-by-agent-month": Snapshot.commission_by_agent_month,
+    "payments-by-month": Snapshot.payments_by_month,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the reporting tables to a Parquet snapshot, or query it.")
+    parser.add_argument("--root", default=settings.SNAPSHOT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="append rows created since the last run and publish a new manifest")
+    export.add_argument("--tables", nargs="+", choices=list(SNAPSHOT_TABLES), default=None)
+    report = commands.add_parser("report", help="answer a reporting question from the snapshot")
+    report.add_argument("name", choices=list(REPORTS))
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = SnapshotExporter(root=args.root).run(args.tables)
+        print(", ".join(f"{name}: {entry['rows']} rows" for name, entry in manifest["tables"].items()))
+    else:
+        result = REPORTS[args.name](Snapshot(args.root))
+        print(",".join(result.column_names))
+        for row in result.to_pylist():
+            print(",".join(str(value) for value in row.values()))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jwt import PyJWTError
 import jwt
@@ -7,39 +6,59 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from fastapi import HTTPException
-from fastapi import status, Depends, Security
+from fastapi import status, Security
 from fastapi.security import APIKeyHeader
 from sqlalchemy.orm import Session
-from .database import DataBaseConnection
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import unit_of_work, async_unit_of_work
+from .hashing import password_hasher
+from .cache import TTLCache
 from enum import Enum
 
 class PasswordUtils:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
     @staticmethod
     def verify_password(raw_password: str, hashed_password: str) -> bool:
-        return PasswordUtils.pwd_context.verify(raw_password, hashed_password)
+        verified, _ = password_hasher.verify_sync(raw_password, hashed_password)
+        return verified
 
     @staticmethod
     def hash_password(password: str) -> str:
-        return PasswordUtils.pwd_context.hash(password)
+        return password_hasher.hash_sync(password)
     
 class EmailUtils:
     @staticmethod
-    def send_email(to_email: str, from_email: str = settings.EMAIL, password: str = settings.PASSWORD, registration_data=None, Subject=None, body=None) -> None:
-        """Send an email using SMTP."""
+    def build_message(to_email: str, Subject=None, body=None) -> MIMEMultipart:
         msg = MIMEMultipart()
         msg['From'] = settings.EMAIL
         msg['To'] = to_email
         msg['Subject'] = Subject
-        if body is None:
-            body = f"your login details are\n{registration_data}"
         msg.attach(MIMEText(body, 'plain'))
-        try:
-            server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
+        return msg
+
+    @staticmethod
+    def connect_smtp(from_email: str = settings.EMAIL, password: str = settings.PASSWORD) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT)
+        if settings.SMTP_STARTTLS:
             server.starttls()
-            
+        server.ehlo()
+        if server.has_extn("auth"):
             server.login(from_email, password)
+        return server
+
+    @staticmethod
+    def queue_email(db: Session, to_email: str, Subject=None, body=None) -> None:
+        """Stage an email in the outbox; it is sent by the outbox worker once the caller commits."""
+        from App.models import EmailOutbox  # Defer import to avoid circular import
+        db.add(EmailOutbox(to_email=to_email, subject=Subject, body=body))
+
+    @staticmethod
+    def send_email(to_email: str, from_email: str = settings.EMAIL, password: str = settings.PASSWORD, registration_data=None, Subject=None, body=None) -> None:
+        """Send an email using SMTP."""
+        if body is None:
+            body = f"your login details are\n{registration_data}"
+        msg = EmailUtils.build_message(to_email, Subject=Subject, body=body)
+        try:
+            server = EmailUtils.connect_smtp(from_email, password)
             
             server.sendmail(from_email, to_email, msg.as_string())
             
@@ -67,63 +86,88 @@ class JWTUtils:
         return decoded_payload
     
 class CurrentLoginVerification:
+    # Authenticated principals keyed by (role, username). Entries are detached ORM
+    # instances, so a cache hit authorizes the request without touching the database.
+    principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
     @staticmethod
-    def get_current_admin_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = Depends(DataBaseConnection.get_db_session)):
-        from App.models import Admin  # Defer import to avoid circular import
-        try:
-            payload = JWTUtils.decode_jwt(api_key)
-            username = payload.get("username")
-            role = payload.get("role")
+    def invalidate_cached_user(role, *usernames):
+        """Drop cached principals; call after updating or deleting a user."""
+        for username in usernames:
+            CurrentLoginVerification.principal_cache.invalidate((role, username))
 
-            if role != UserRole.admin:
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    @staticmethod
+    def _decode_principal(api_key: str, user_role):
+        payload = JWTUtils.decode_jwt(api_key)
+        username = payload.get("username")
+        role = payload.get("role")
+
+        if role != user_role:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+        return username
 
-            admin_user = db.query(Admin).filter(Admin.username == username).first()
-            if not admin_user:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or user does not exist")
-            
-            return admin_user
-        except Exception as e:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
-        
     @staticmethod
-    def get_current_customer_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = Depends(DataBaseConnection.get_db_session)):
-        from App.models import Customer  # Defer import to avoid circular import
+    def _get_current_user(api_key: str, db: Session, user_role):
+        from App.auth import AuthService  # Defer import to avoid circular import
         try:
-            payload = JWTUtils.decode_jwt(api_key)
-            username = payload.get("username")
-            role = payload.get("role")
-
-            if role != UserRole.customer:
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+            username = CurrentLoginVerification._decode_principal(api_key, user_role)
+            current_user = CurrentLoginVerification.principal_cache.get((user_role, username))
+            if current_user is not None:
+                return current_user
 
-            customer_user = db.query(Customer).filter(Customer.username == username).first()
-            if not customer_user:
+            current_user = AuthService.get_user(db, user_role, username)
+            if not current_user:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or user does not exist")
-            
-            return customer_user
+
+            db.expunge(current_user)
+            CurrentLoginVerification.principal_cache.set((user_role, username), current_user)
+            return current_user
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+    @staticmethod
+    def get_current_admin_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = unit_of_work):
+        return CurrentLoginVerification._get_current_user(api_key, db, UserRole.admin)
         
     @staticmethod
-    def get_current_employee_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = Depends(DataBaseConnection.get_db_session)):
-        from App.models import Employee  # Defer import to avoid circular import
-        try:
-            payload = JWTUtils.decode_jwt(api_key)
-            username = payload.get("username")
-            role = payload.get("role")
+    def get_current_customer_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = unit_of_work):
+        return CurrentLoginVerification._get_current_user(api_key, db, UserRole.customer)
+        
+    @staticmethod
+    def get_current_employee_user(api_key: str = Security(APIKeyHeader(name="Authorization")), db: Session = unit_of_work):
+        return CurrentLoginVerification._get_current_user(api_key, db, UserRole.employee)
 
-            if role != UserRole.employee:
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    @staticmethod
+    async def _get_current_user_async(api_key: str, db: AsyncSession, user_role):
+        from App.auth import AuthService  # Defer import to avoid circular import
+        try:
+            username = CurrentLoginVerification._decode_principal(api_key, user_role)
+            current_user = CurrentLoginVerification.principal_cache.get((user_role, username))
+            if current_user is not None:
+                return current_user
 
-            employee_user = db.query(Employee).filter(Employee.username == username).first()
-            if not employee_user:
+            current_user = await AuthService.get_user_async(db, user_role, username)
+            if not current_user:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or user does not exist")
-            
-            return employee_user
+
+            db.expunge(current_user)
+            CurrentLoginVerification.principal_cache.set((user_role, username), current_user)
+            return current_user
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
+    @staticmethod
+    async def get_current_admin_user_async(api_key: str = Security(APIKeyHeader(name="Authorization")), db: AsyncSession = async_unit_of_work):
+        return await CurrentLoginVerification._get_current_user_async(api_key, db, UserRole.admin)
+
+    @staticmethod
+    async def get_current_customer_user_async(api_key: str = Security(APIKeyHeader(name="Authorization")), db: AsyncSession = async_unit_of_work):
+        return await CurrentLoginVerification._get_current_user_async(api_key, db, UserRole.customer)
+
+    @staticmethod
+    async def get_current_employee_user_async(api_key: str = Security(APIKeyHeader(name="Authorization")), db: AsyncSession = async_unit_of_work):
+        return await CurrentLoginVerification._get_current_user_async(api_key, db, UserRole.employee)
+
 class UserRole(str, Enum):
     admin = "Admin"
     employee = "Employee"
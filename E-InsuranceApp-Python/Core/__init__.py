@@ -4,8 +4,7 @@ from fastapi.exceptions import HTTPException, RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from Core import loggers
 
-log_file = "fundoo_notes.log"
-logger = loggers.setup_logger(log_file)
+logger = loggers.get_logger(__name__)
 
 def base_exception_handler(request: Request, exception: Exception):
     logger.error(f"Unexpected Error: {str(exception)} - Path: {request.url.path}")
@@ -1,16 +1,115 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime
+from Core.settings import settings
 
-logging.basicConfig(filemode='a')
-def setup_logger(log_file):
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
+# Attributes every LogRecord has; anything else on a record came in through `extra=` and is logged as a field.
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
 
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    file_handler.setFormatter(formatter)
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra=` fields alongside the standard ones."""
 
-    logger.addHandler(file_handler)
-    
-    return logger
\ No newline at end of file
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Resolves the message before the record is queued but, unlike QueueHandler, keeps the traceback out of the message."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+def _formatter() -> logging.Formatter:
+    return JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+def _file_handler() -> logging.Handler:
+    if settings.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(settings.LOG_FILE, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_BACKUP_COUNT, delay=True)
+    return logging.handlers.RotatingFileHandler(settings.LOG_FILE, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, delay=True)
+
+def build_handlers() -> list:
+    """One handler per destination: the log file and, when enabled, stderr."""
+    handlers = [_file_handler()]
+    if settings.LOG_CONSOLE:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    formatter = _formatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+class LoggingSubsystem:
+    """Routes every application log record through one QueueHandler on the root logger.
+
+    Request threads only enqueue the record; a single QueueListener thread formats
+    it and writes it to each destination. Configuring is idempotent, so importing
+    a module that asks for a logger never adds another handler.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = None
+        self.handler = None
+        self.listener = None
+
+    def configure(self):
+        with self.lock:
+            if self.listener is not None:
+                return
+            self.queue = queue.Queue(-1)
+            self.handler = RecordQueueHandler(self.queue)
+            root = logging.getLogger()
+            root.addHandler(self.handler)
+            root.setLevel(settings.LOG_LEVEL)
+            for name, level in settings.LOG_LEVELS.items():
+                logging.getLogger(name).setLevel(level)
+            self.listener = logging.handlers.QueueListener(self.queue, *build_handlers(), respect_handler_level=True)
+            self.listener.start()
+            atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Drain the queue and close the destinations."""
+        with self.lock:
+            if self.listener is None:
+                return
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            logging.getLogger().removeHandler(self.handler)
+            self.listener = None
+
+
+logging_subsystem = LoggingSubsystem()
+
+def get_logger(name: str) -> logging.Logger:
+    """The module's logger; LOG_LEVELS can set its level by name, e.g. {"App.outbox": "WARNING"}."""
+    logging_subsystem.configure()
+    return logging.getLogger(name)
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,5 +10,51 @@ class Settings(BaseSettings):
     PASSWORD: str
     SMTP_SERVER: str
     SMTP_PORT: int
-    
-settings = Settings()    
+    SMTP_STARTTLS: bool = True
+    DB_ASYNC: bool = False
+    ASYNC_DB_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+    BULK_REGISTER_MAX_ROWS: int = 10000
+    POLICY_BATCH_MAX_ROWS: int = 1000
+    QUOTE_MAX_OPTIONS: int = 1000
+    PAYMENT_BATCH_MAX_ROWS: int = 5000
+    RECONCILE_PARTITIONS: int = 64
+    RECONCILE_BATCH_SIZE: int = 5000
+    SNAPSHOT_DIR: str = "snapshots"
+    SNAPSHOT_BATCH_SIZE: int = 50000
+    SNAPSHOT_LAG_SECONDS: float = 60
+    LOG_FILE: str = "insurance.log"
+    LOG_FORMAT: str = "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_CONSOLE: bool = True
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    LOG_ROTATE_WHEN: Optional[str] = None
+    PREMIUM_AGE_LOADINGS: Dict[int, int] = {}
+    RECOMPUTE_CHUNK_SIZE: int = 5000
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60
+    CATALOG_CACHE_TTL: float = 300
+    CATALOG_PREWARM: bool = False
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_DEPTH: int = 64
+    OUTBOX_WORKER_ENABLED: bool = False
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_INTERVAL: float = 5
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_BACKOFF_SECONDS: float = 30
+    POLICY_LIFECYCLE_ENABLED: bool = False
+    POLICY_LIFECYCLE_INTERVAL: float = 3600
+    POLICY_LIFECYCLE_CHUNK_SIZE: int = 1000
+    POLICY_LIFECYCLE_WORKERS: int = 4
+
+settings = Settings()
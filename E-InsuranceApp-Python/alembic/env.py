@@ -5,7 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from Insuarance.models import Base
+from App.models import Base
 from Core.settings import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,41 @@
+"""Email outbox
+
+Revision ID: 3c1f5a9d2b47
+Revises: 892582a7a271
+Create Date: 2026-10-18 10:05:12.214530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3c1f5a9d2b47'
+down_revision: Union[str, None] = '892582a7a271'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+    sa.Column('outbox_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('to_email', sa.String(length=100), nullable=False),
+    sa.Column('subject', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('outbox_id')
+    )
+    op.create_index(op.f('ix_email_outbox_outbox_id'), 'email_outbox', ['outbox_id'], unique=False)
+    op.create_index('ix_email_outbox_status_next_attempt_at', 'email_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt_at', table_name='email_outbox')
+    op.drop_index(op.f('ix_email_outbox_outbox_id'), table_name='email_outbox')
+    op.drop_table('email_outbox')
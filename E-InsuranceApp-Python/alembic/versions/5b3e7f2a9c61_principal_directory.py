@@ -0,0 +1,63 @@
+"""Principal directory
+
+Revision ID: 5b3e7f2a9c61
+Revises: a4d8e1f3c6b2
+Create Date: 2026-10-18 13:41:09.216734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5b3e7f2a9c61'
+down_revision: Union[str, None] = 'a4d8e1f3c6b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (role, table) pairs; each table's key column is "<table>_id" on both sides.
+ROLE_TABLES = [
+    ('Admin', 'admin'),
+    ('Employee', 'employee'),
+    ('Agent', 'agent'),
+    ('Customer', 'customer'),
+]
+
+
+def upgrade() -> None:
+    op.create_table('principal',
+    sa.Column('principal_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('admin_id', sa.BigInteger(), nullable=True),
+    sa.Column('employee_id', sa.BigInteger(), nullable=True),
+    sa.Column('agent_id', sa.BigInteger(), nullable=True),
+    sa.Column('customer_id', sa.BigInteger(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['admin_id'], ['admin.admin_id'], ),
+    sa.ForeignKeyConstraint(['employee_id'], ['employee.employee_id'], ),
+    sa.ForeignKeyConstraint(['agent_id'], ['agent.agent_id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customer.customer_id'], ),
+    sa.PrimaryKeyConstraint('principal_id'),
+    sa.UniqueConstraint('admin_id'),
+    sa.UniqueConstraint('employee_id'),
+    sa.UniqueConstraint('agent_id'),
+    sa.UniqueConstraint('customer_id')
+    )
+    op.create_index('ix_principal_role_username', 'principal', ['role', 'username'], unique=True)
+    op.create_index('ix_principal_role_email', 'principal', ['role', 'email'], unique=False)
+    # Copy the credentials already stored on the role tables.
+    for role, table in ROLE_TABLES:
+        op.execute(
+            f"INSERT INTO principal (role, username, email, password, {table}_id, created_at) "
+            f"SELECT '{role}', username, email, password, {table}_id, COALESCE(created_at, CURRENT_TIMESTAMP) FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_principal_role_email', table_name='principal')
+    op.drop_index('ix_principal_role_username', table_name='principal')
+    op.drop_table('principal')
@@ -0,0 +1,37 @@
+"""Agent commission totals
+
+Revision ID: 7e2b9c4d1a58
+Revises: 3c1f5a9d2b47
+Create Date: 2026-10-18 11:20:41.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7e2b9c4d1a58'
+down_revision: Union[str, None] = '3c1f5a9d2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('agent_commission_totals',
+    sa.Column('agent_id', sa.BigInteger(), nullable=False),
+    sa.Column('total_commission', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('commission_count', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['agent_id'], ['agent.agent_id'], ),
+    sa.PrimaryKeyConstraint('agent_id')
+    )
+    # Seed the running totals from the commissions recorded so far.
+    op.execute(
+        "INSERT INTO agent_commission_totals (agent_id, total_commission, commission_count, updated_at) "
+        "SELECT agent_id, SUM(commission_amount), COUNT(*), CURRENT_TIMESTAMP FROM commission GROUP BY agent_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('agent_commission_totals')
@@ -0,0 +1,46 @@
+"""Hot lookup indexes
+
+Revision ID: a4d8e1f3c6b2
+Revises: 7e2b9c4d1a58
+Create Date: 2026-10-18 12:02:17.904312
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a4d8e1f3c6b2'
+down_revision: Union[str, None] = '7e2b9c4d1a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Registration rejects duplicate usernames and JWTs identify users by username,
+# so those indexes are unique. Email is only looked up at login and has never
+# been deduplicated, so it gets a plain index.
+INDEXES = [
+    ('admin', 'username', True),
+    ('admin', 'email', False),
+    ('employee', 'username', True),
+    ('employee', 'email', False),
+    ('agent', 'username', True),
+    ('agent', 'email', False),
+    ('customer', 'username', True),
+    ('customer', 'email', False),
+    ('customer', 'agent_id', False),
+    ('policy', 'customer_id', False),
+    ('policy', 'scheme_id', False),
+    ('commission', 'agent_id', False),
+    ('payment', 'policy_id', False),
+]
+
+
+def upgrade() -> None:
+    for table, column, unique in INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=unique)
+
+
+def downgrade() -> None:
+    for table, column, unique in reversed(INDEXES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
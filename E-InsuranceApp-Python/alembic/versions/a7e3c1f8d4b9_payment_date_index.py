@@ -0,0 +1,26 @@
+"""Payment date index
+
+Revision ID: a7e3c1f8d4b9
+Revises: f2a6d9c3b8e7
+Create Date: 2026-10-18 20:03:27.118904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a7e3c1f8d4b9'
+down_revision: Union[str, None] = 'f2a6d9c3b8e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reconciliation reads the payments of a statement's period.
+    op.create_index(op.f('ix_payment_payment_date'), 'payment', ['payment_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_payment_date'), table_name='payment')
@@ -0,0 +1,36 @@
+"""Agent portfolio rollups
+
+Revision ID: b8d2f6a4c3e1
+Revises: a7e3c1f8d4b9
+Create Date: 2026-10-18 20:41:55.302716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b8d2f6a4c3e1'
+down_revision: Union[str, None] = 'a7e3c1f8d4b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('agent_portfolio_month',
+    sa.Column('agent_id', sa.BigInteger(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('customers_added', sa.BigInteger(), nullable=False),
+    sa.Column('policies_issued', sa.BigInteger(), nullable=False),
+    sa.Column('policies_closed', sa.BigInteger(), nullable=False),
+    sa.Column('premium_change', sa.DECIMAL(precision=16, scale=2), nullable=False),
+    sa.Column('commission', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['agent_id'], ['agent.agent_id'], ),
+    sa.PrimaryKeyConstraint('agent_id', 'month')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('agent_portfolio_month')
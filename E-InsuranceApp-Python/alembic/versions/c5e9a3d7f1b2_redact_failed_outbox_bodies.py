@@ -0,0 +1,26 @@
+"""Redact failed outbox bodies
+
+Revision ID: c5e9a3d7f1b2
+Revises: b8d2f6a4c3e1
+Create Date: 2026-10-18 21:12:40.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c5e9a3d7f1b2'
+down_revision: Union[str, None] = 'b8d2f6a4c3e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Failed welcome emails will never be sent but still hold the plaintext credentials.
+    op.execute(sa.text("UPDATE email_outbox SET body = NULL WHERE status = 'failed'"))
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,25 @@
+"""Policy row version
+
+Revision ID: c7a2d5e8f914
+Revises: 5b3e7f2a9c61
+Create Date: 2026-10-18 15:12:44.803127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c7a2d5e8f914'
+down_revision: Union[str, None] = '5b3e7f2a9c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('policy', sa.Column('row_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('policy', 'row_version')
@@ -0,0 +1,43 @@
+"""Premium recompute jobs
+
+Revision ID: d3f8a1b6e2c4
+Revises: c7a2d5e8f914
+Create Date: 2026-10-18 16:40:12.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd3f8a1b6e2c4'
+down_revision: Union[str, None] = 'c7a2d5e8f914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('policy', sa.Column('age_loading', sa.Integer(), server_default='0', nullable=False))
+    # Re-pricing joins commissions to their policy chunk.
+    op.create_index(op.f('ix_commission_policy_id'), 'commission', ['policy_id'], unique=False)
+    op.create_table('premium_recompute_job',
+    sa.Column('job_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('scheme_id', sa.BigInteger(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('last_policy_id', sa.BigInteger(), nullable=False),
+    sa.Column('upto_policy_id', sa.BigInteger(), nullable=False),
+    sa.Column('processed', sa.BigInteger(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index(op.f('ix_premium_recompute_job_scheme_id'), 'premium_recompute_job', ['scheme_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_premium_recompute_job_scheme_id'), table_name='premium_recompute_job')
+    op.drop_table('premium_recompute_job')
+    op.drop_index(op.f('ix_commission_policy_id'), table_name='commission')
+    op.drop_column('policy', 'age_loading')
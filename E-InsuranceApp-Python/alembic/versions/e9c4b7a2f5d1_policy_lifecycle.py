@@ -0,0 +1,40 @@
+"""Policy lifecycle status
+
+Revision ID: e9c4b7a2f5d1
+Revises: d3f8a1b6e2c4
+Create Date: 2026-10-18 18:05:41.203117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e9c4b7a2f5d1'
+down_revision: Union[str, None] = 'd3f8a1b6e2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('policy', sa.Column('status', sa.String(length=20), server_default='active', nullable=False))
+    # The lifecycle processor range-scans the active policies by lapse date.
+    op.create_index('ix_policy_status_lapse_date', 'policy', ['status', 'policy_lapse_date'], unique=False)
+    op.create_table('policy_status_history',
+    sa.Column('history_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('policy_id', sa.BigInteger(), nullable=False),
+    sa.Column('from_status', sa.String(length=20), nullable=False),
+    sa.Column('to_status', sa.String(length=20), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['policy_id'], ['policy.policy_id'], ),
+    sa.PrimaryKeyConstraint('history_id')
+    )
+    op.create_index(op.f('ix_policy_status_history_policy_id'), 'policy_status_history', ['policy_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_policy_status_history_policy_id'), table_name='policy_status_history')
+    op.drop_table('policy_status_history')
+    op.drop_index('ix_policy_status_lapse_date', table_name='policy')
+    op.drop_column('policy', 'status')
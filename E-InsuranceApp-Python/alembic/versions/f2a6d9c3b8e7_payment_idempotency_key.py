@@ -0,0 +1,27 @@
+"""Payment idempotency key
+
+Revision ID: f2a6d9c3b8e7
+Revises: e9c4b7a2f5d1
+Create Date: 2026-10-18 19:12:08.674512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f2a6d9c3b8e7'
+down_revision: Union[str, None] = 'e9c4b7a2f5d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('payment', sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_payment_idempotency_key'), 'payment', ['idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_idempotency_key'), table_name='payment')
+    op.drop_column('payment', 'idempotency_key')
@@ -0,0 +1,106 @@
+"""Show query plans and timings for the hot lookups before and after the a4d8e1f3c6b2 indexes.
+
+Seeds a throwaway SQLite database from App.models, runs each lookup with only the
+primary-key indexes of the initial migration, then with the new indexes.
+
+    python -m benchmarks.index_query_plans --agents 200 --customers 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, datetime
+from sqlalchemy import create_engine, text, BigInteger
+from sqlalchemy.ext.compiler import compiles
+from App.models import Base
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER PRIMARY KEY columns.
+    return "INTEGER"
+
+NEW_INDEXES = [
+    ("admin", "username"), ("admin", "email"),
+    ("employee", "username"), ("employee", "email"),
+    ("agent", "username"), ("agent", "email"),
+    ("customer", "username"), ("customer", "email"), ("customer", "agent_id"),
+    ("policy", "customer_id"), ("policy", "scheme_id"),
+    ("commission", "agent_id"),
+    ("payment", "policy_id"),
+]
+
+QUERIES = {
+    "login (customer by email)": "SELECT * FROM customer WHERE email = :email",
+    "auth dependency (customer by username)": "SELECT * FROM customer WHERE username = :username",
+    "agent by email": "SELECT * FROM agent WHERE email = :agent_email",
+    "customers of an agent": "SELECT * FROM customer WHERE agent_id = :agent_id",
+    "policies of a customer": "SELECT * FROM policy WHERE customer_id = :customer_id",
+    "policies of a scheme": "SELECT count(*) FROM policy WHERE scheme_id = :scheme_id",
+    "agent commission": "SELECT sum(commission_amount) FROM commission WHERE agent_id = :agent_id",
+    "payments of a policy": "SELECT * FROM payment WHERE policy_id = :policy_id",
+}
+
+def seed(conn, agents: int, customers: int):
+    now = datetime.now()
+    conn.execute(text("INSERT INTO insuranceplan (plan_name, plan_details, created_at) VALUES ('plan', 'details', :now)"), {"now": now})
+    conn.execute(text(
+        "INSERT INTO scheme (scheme_name, scheme_details, plan_id, price, created_at, scheme_tenure, scheme_amount) "
+        "VALUES (:name, 'details', 1, 10, :now, 12, 1200)"), [{"name": f"scheme{i}", "now": now} for i in range(50)])
+    conn.execute(text(
+        "INSERT INTO agent (username, password, fullname, email, created_at) VALUES (:u, 'x', 'Agent', :e, :now)"),
+        [{"u": f"agent{i}", "e": f"agent{i}@example.com", "now": now} for i in range(agents)])
+    conn.execute(text(
+        "INSERT INTO customer (username, password, fullname, email, phone_number, date_of_birth, agent_id, created_at) "
+        "VALUES (:u, 'x', 'Customer', :e, '123', :dob, :a, :now)"),
+        [{"u": f"customer{i}", "e": f"customer{i}@example.com", "dob": date(1990, 1, 1), "a": random.randint(1, agents), "now": now}
+         for i in range(customers)])
+    conn.execute(text(
+        "INSERT INTO policy (customer_id, scheme_id, policy_details, premium, date_issued, maturity_period, policy_lapse_date, created_at) "
+        "VALUES (:c, :s, 'details', 1200, :d, 5, :d, :now)"),
+        [{"c": i + 1, "s": random.randint(1, 50), "d": date.today(), "now": now} for i in range(customers)])
+    conn.execute(text(
+        "INSERT INTO commission (agent_id, policy_id, commission_amount, created_at) VALUES (:a, :p, 300, :now)"),
+        [{"a": random.randint(1, agents), "p": i + 1, "now": now} for i in range(customers)])
+    conn.execute(text(
+        "INSERT INTO payment (customer_id, policy_id, amount, payment_date, created_at) VALUES (:c, :c, 100, :d, :now)"),
+        [{"c": i + 1, "d": date.today(), "now": now} for i in range(customers)])
+
+def run(conn, params, label: str, repeat: int):
+    print(f"\n=== {label} ===")
+    for name, sql in QUERIES.items():
+        plan = " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(text(sql), params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:42s} {elapsed:9.3f} ms  {plan}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--customers", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".db") as db_file:
+        engine = create_engine(f"sqlite:///{db_file.name}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for table, column in NEW_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_{column}"))
+            seed(conn, args.agents, args.customers)
+            conn.execute(text("ANALYZE"))
+
+        target = args.customers // 2
+        params = {"email": f"customer{target}@example.com", "username": f"customer{target}", "agent_email": "agent7@example.com",
+                  "agent_id": 7, "customer_id": target, "scheme_id": 7, "policy_id": target}
+        with engine.begin() as conn:
+            run(conn, params, "before (primary-key indexes only)", args.repeat)
+            for table, column in NEW_INDEXES:
+                unique = "UNIQUE " if column == "username" else ""
+                conn.execute(text(f"CREATE {unique}INDEX ix_{table}_{column} ON {table} ({column})"))
+            conn.execute(text("ANALYZE"))
+            run(conn, params, "after (a4d8e1f3c6b2 indexes)", args.repeat)
+
+if __name__ == "__main__":
+    main()
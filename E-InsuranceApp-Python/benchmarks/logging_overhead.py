@@ -0,0 +1,97 @@
+"""Compare the logging cost on the request path of the old per-import FileHandlers with Core.loggers' queue.
+
+Serves a throwaway route that logs --lines messages per request, first the way the routers
+used to (one shared logger with a synchronous FileHandler added by each of --handlers
+imports, so every line is formatted and written that many times), then through a single
+QueueHandler whose QueueListener formats JSON and writes the file on its own thread.
+Also reports the time for the listener to drain once the requests are done.
+
+    python -m benchmarks.logging_overhead --requests 2000 --lines 5 --handlers 24
+"""
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from Core.loggers import JsonFormatter, TEXT_FORMAT
+
+def legacy_logger(path: str, handlers: int) -> logging.Logger:
+    logger = logging.Logger("benchmark.legacy", logging.INFO)
+    for _ in range(handlers):
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        logger.addHandler(handler)
+    return logger
+
+def queued_logger(path: str):
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=1024 ** 3)
+    handler.setFormatter(JsonFormatter())
+    records = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(records, handler)
+    logger = logging.Logger("benchmark.queued", logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    listener.start()
+    return logger, listener
+
+def build_app(logger: logging.Logger, lines: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/policy/{policy_id}")
+    def read_policy(policy_id: int):
+        for line in range(lines):
+            logger.info(f"Policy {policy_id} read, step {line}")
+        return {"message": "Policy fetched successfully", "status": 200}
+
+    return app
+
+def timed(logger: logging.Logger, lines: int, requests: int) -> float:
+    client = TestClient(build_app(logger, lines))
+    client.get("/policy/0")
+    start = time.perf_counter()
+    for policy_id in range(requests):
+        client.get(f"/policy/{policy_id}")
+    return (time.perf_counter() - start) / requests * 1000
+
+def count_lines(path: str) -> int:
+    with open(path) as file:
+        return sum(1 for _ in file)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5, help="log calls per request")
+    parser.add_argument("--handlers", type=int, default=24, help="FileHandlers on the legacy logger, one per setup_logger() call")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        silent_ms = timed(logging.Logger("benchmark.silent", logging.CRITICAL), args.lines, args.requests)
+
+        legacy_path = os.path.join(directory, "legacy.log")
+        logger = legacy_logger(legacy_path, args.handlers)
+        legacy_ms = timed(logger, args.lines, args.requests)
+        for handler in logger.handlers:
+            handler.close()
+
+        queued_path = os.path.join(directory, "queued.log")
+        logger, listener = queued_logger(queued_path)
+        queued_ms = timed(logger, args.lines, args.requests)
+        start = time.perf_counter()
+        listener.stop()
+        drain_ms = (time.perf_counter() - start) * 1000
+        for handler in listener.handlers:
+            handler.close()
+
+        written = args.lines * (args.requests + 1)
+        print(f"{'setup':>32s} {'ms/request':>11s} {'us/log call':>12s} {'lines in file':>14s}")
+        print(f"{'no logging':>32s} {silent_ms:11.3f} {'':>12s} {'':>14s}")
+        for name, ms, path in ((f"{args.handlers} FileHandlers, synchronous", legacy_ms, legacy_path), ("QueueHandler + listener, JSON", queued_ms, queued_path)):
+            print(f"{name:>32s} {ms:11.3f} {(ms - silent_ms) * 1000 / args.lines:12.1f} {count_lines(path):14d}")
+        print(f"{written} log calls; the listener needed {drain_ms:.1f} ms after the last request to finish writing")
+
+if __name__ == "__main__":
+    main()
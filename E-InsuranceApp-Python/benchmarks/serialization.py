@@ -0,0 +1,63 @@
+"""Compare the per-row `from_orm` + response_model path with App.serialization.json_response.
+
+Builds N Policy instances in memory and serves them from two throwaway routes, one the
+way read_all_policy used to (row-by-row from_orm, then FastAPI validates and encodes the
+response again), one through json_response (a single TypeAdapter validation and dump).
+
+    python -m benchmarks.serialization --rows 1000 10000 100000
+"""
+import argparse
+import time
+import warnings
+from datetime import date, datetime
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from App.models import Policy
+from App.schemas import PolicySchema, PolicyReadSchema
+from App.serialization import json_response
+
+def build_policies(rows: int):
+    now = datetime.now()
+    return [Policy(policy_id=i + 1, customer_id=i + 1, scheme_id=i % 50 + 1, policy_details=f"policy details {i}", premium=1200,
+                   date_issued=date.today(), maturity_period=5, policy_lapse_date=date.today(), created_at=now)
+            for i in range(rows)]
+
+def build_app(policies) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=PolicyReadSchema)
+    def legacy():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            data = [PolicySchema.from_orm(policy) for policy in policies]
+        return {"message": "All Policy fetched successfully", "status": 200, "data": data, "next_cursor": None}
+
+    @app.get("/fast", response_model=PolicyReadSchema)
+    def fast():
+        return json_response(PolicyReadSchema, {"message": "All Policy fetched successfully", "status": 200, "data": policies, "next_cursor": None})
+
+    return app
+
+def timed(client: TestClient, path: str, repeat: int):
+    client.get(path)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.get(path)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8s} {'from_orm + response_model':>28s} {'json_response':>15s} {'speedup':>8s}")
+    for rows in args.rows:
+        client = TestClient(build_app(build_policies(rows)))
+        legacy_ms = timed(client, "/legacy", args.repeat)
+        fast_ms = timed(client, "/fast", args.repeat)
+        assert client.get("/legacy").json() == client.get("/fast").json()
+        print(f"{rows:8d} {legacy_ms:25.1f} ms {fast_ms:12.1f} ms {legacy_ms / fast_ms:7.1f}x")
+
+if __name__ == "__main__":
+    main()